@@ -0,0 +1,31 @@
+"""
+gunicorn configuration of the production server.
+
+Started by the serve management command, which passes it with
+``--config python:app.gunicorn_conf``. Every setting comes from
+settings.SERVER, see core.serving.
+"""
+
+import os
+
+from django.conf import settings
+
+from core.serving import MemoryRecycler, server_options
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+# settings are loaded here in the master, before the workers import
+# app.asgi, so its ASYNC_API_VIEWS default has to be applied first
+if os.environ.get('SERVER_ASGI') == '1':
+    os.environ.setdefault('ASYNC_API_VIEWS', '1')
+
+globals().update(server_options(settings.SERVER))
+
+
+def post_worker_init(worker):
+    """recycle the worker once its memory grew too much"""
+    from django.core.signals import request_finished
+
+    recycler = MemoryRecycler(
+        settings.SERVER['MAX_MEMORY_GROWTH_MB'] * 1024 * 1024
+    )
+    request_finished.connect(recycler, weak=False)
@@ -20,12 +20,18 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-g05%vk94vuhg^ylrqwvs^5pnq-lhyohwf=9%i*qu-=)ur*jeua'
+SECRET_KEY = os.environ.get(
+    'SECRET_KEY',
+    'django-insecure-g05%vk94vuhg^ylrqwvs^5pnq-lhyohwf=9%i*qu-=)ur*jeua'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# DEBUG also keeps every executed query in memory, see DEBUG=0 for serving
+DEBUG = bool(int(os.environ.get('DEBUG', 1)))
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host for host in os.environ.get('ALLOWED_HOSTS', '').split(',') if host
+]
 
 
 # Application definition
@@ -37,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'core',
@@ -78,13 +85,62 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# core.db.backends.postgresql adds CONN_HEALTH_CHECKS, checking persistent
+# connections before their first use in a request, and POOL, an in-process
+# pool for threaded and async workers enabled with DB_POOL_MAX_SIZE, which
+# waits up to TIMEOUT seconds for a free connection and closes connections
+# older than MAX_AGE seconds.
+DB_POOL = {
+    'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 0)),
+    'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    'MAX_AGE': int(os.environ.get('DB_POOL_MAX_AGE', 600)),
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': bool(
+            int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1))
+        ),
+        'POOL': DB_POOL if DB_POOL['MAX_SIZE'] else None,
+    }
+}
+
+# Read replicas of the default database, one per host in DB_REPLICA_HOSTS.
+# core.db.routers sends reads of safe API requests to them, except for
+# users who wrote within REPLICA_PIN_SECONDS, which should exceed the
+# replication lag. Pins are kept in REPLICA_PIN_CACHE, which must be a cache
+# every process reaches, such as memcached, when several processes serve
+# requests; a per-process cache gets warning core.W001. A replica refusing
+# connections is skipped for REPLICA_RETRY_SECONDS.
+REPLICA_DATABASES = []
+for number, host in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    REPLICA_DATABASES.append(f'replica{number}')
+    DATABASES[f'replica{number}'] = dict(
+        DATABASES['default'], HOST=host, TEST={'MIRROR': 'default'}
+    )
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+REPLICA_PIN_CACHE = os.environ.get('REPLICA_PIN_CACHE', 'default')
+REPLICA_RETRY_SECONDS = int(os.environ.get('REPLICA_RETRY_SECONDS', 30))
+
+
+# Cache shared by the server processes, for RESPONSE_CACHE and
+# TOKEN_AUTH_CACHE with several workers, such as
+# django.core.cache.backends.memcached.PyMemcacheCache
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -108,6 +164,29 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+
+# PooledPBKDF2PasswordHasher keeps the pbkdf2_sha256 algorithm name and
+# verifies those hashes, Django's PBKDF2PasswordHasher must not follow it
+PASSWORD_HASHERS = os.environ.get(
+    'PASSWORD_HASHERS',
+    'core.hashers.PooledPBKDF2PasswordHasher,'
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher,'
+    'django.contrib.auth.hashers.Argon2PasswordHasher,'
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+).split(',')
+
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get('PASSWORD_HASH_ITERATIONS', 260000)
+)
+
+# number of passwords hashed concurrently, defaults to one per core
+PASSWORD_HASH_WORKERS = int(
+    os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -131,9 +210,126 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Media is served by core.views.serve_media. Set MEDIA_SENDFILE to
+# 'x-sendfile' (Apache, lighttpd) or 'x-accel-redirect' (nginx, with an
+# internal location at MEDIA_ACCEL_REDIRECT_PREFIX aliased to MEDIA_ROOT)
+# to let the front proxy send the files.
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/'
+)
+# max-age of media whose name is not a content hash, such as variants
+MEDIA_MAX_AGE = int(os.environ.get('MEDIA_MAX_AGE', 24 * 60 * 60))
+
+# Resized variants generated in the background for every recipe image,
+# name: (max width, max height)
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': (150, 150),
+    'medium': (600, 600),
+    'large': (1200, 1200),
+}
+# Limits checked while a recipe image upload is streamed to disk
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.environ.get('RECIPE_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40 * 1000 * 1000)
+)
+RECIPE_IMAGE_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+# Keep upload temporary files on the media volume so finished uploads are
+# renamed into place instead of copied
+FILE_UPLOAD_TEMP_DIR = os.environ.get('FILE_UPLOAD_TEMP_DIR')
+
+# Unreferenced recipe images younger than this are not deleted yet
+RECIPE_IMAGE_GRACE_SECONDS = int(
+    os.environ.get('RECIPE_IMAGE_GRACE_SECONDS', 3600)
+)
+
+RECIPE_IMAGE_QUALITY = int(os.environ.get('RECIPE_IMAGE_QUALITY', 85))
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-AUTH_USER_MODEL = 'core.User'
\ No newline at end of file
+AUTH_USER_MODEL = 'core.User'
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'recipe.pagination.RecipeCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    # uses orjson when installed, otherwise renders like JSONRenderer
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+}
+
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+
+# Authentication token cache, a local LRU optionally backed by one of CACHES.
+# With SHARED_CACHE every request checks the token's generation there, so
+# revocations reach all processes at once. Without it other processes cannot
+# be told, so local entries are kept at most LOCAL_TIMEOUT seconds.
+TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES': int(os.environ.get('TOKEN_AUTH_CACHE_MAX_ENTRIES', 10000)),
+    'TIMEOUT': int(os.environ.get('TOKEN_AUTH_CACHE_TIMEOUT', 30)),
+    'LOCAL_TIMEOUT': int(os.environ.get('TOKEN_AUTH_LOCAL_TIMEOUT', 2)),
+    'SHARED_CACHE': os.environ.get('TOKEN_AUTH_SHARED_CACHE'),
+}
+
+# Per-user cache of recipe API responses: 'local' (per process), 'shared'
+# (the SHARED_CACHE alias of CACHES) or 'none'. Collection versions always
+# live in SHARED_CACHE, so with several processes it must be a cache they all
+# reach, such as memcached, whatever the backend.
+RESPONSE_CACHE = {
+    'BACKEND': os.environ.get('RESPONSE_CACHE_BACKEND', 'local'),
+    'SHARED_CACHE': os.environ.get('RESPONSE_CACHE_SHARED_CACHE', 'default'),
+    'MAX_ENTRIES': int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 10000)),
+    'TIMEOUT': int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300)),
+}
+
+API_MAX_BULK_ITEMS = int(os.environ.get('API_MAX_BULK_ITEMS', 10000))
+
+# Full-text recipe search, the text search configuration used on PostgreSQL
+# and the number of per-user indexes kept by the fallback on other databases
+RECIPE_SEARCH_CONFIG = os.environ.get('RECIPE_SEARCH_CONFIG', 'english')
+RECIPE_SEARCH_INDEX_ENTRIES = int(
+    os.environ.get('RECIPE_SEARCH_INDEX_ENTRIES', 1000)
+)
+
+# Tag and ingredient autocomplete, the most names returned per request and
+# the number of per-user result sets kept in memory
+RECIPE_AUTOCOMPLETE_LIMIT = int(os.environ.get('RECIPE_AUTOCOMPLETE_LIMIT', 10))
+RECIPE_AUTOCOMPLETE_CACHE_ENTRIES = int(
+    os.environ.get('RECIPE_AUTOCOMPLETE_CACHE_ENTRIES', 1000)
+)
+
+# Serve cached reads straight from the event loop with async views, set by
+# app.asgi; under WSGI the regular synchronous views are used
+ASYNC_API_VIEWS = bool(int(os.environ.get('ASYNC_API_VIEWS', 0)))
+
+# Production server, see core.serving and the serve command. WORKERS 0
+# sizes the pool from the available cores; workers are replaced after
+# MAX_REQUESTS requests or once they grew MAX_MEMORY_GROWTH_MB since boot
+SERVER = {
+    'BIND': os.environ.get('SERVER_BIND', '0.0.0.0:8000'),
+    'ASGI': bool(int(os.environ.get('SERVER_ASGI', 0))),
+    'WORKERS': int(os.environ.get('SERVER_WORKERS', 0)),
+    'THREADS': int(os.environ.get('SERVER_THREADS', 1)),
+    'KEEPALIVE': int(os.environ.get('SERVER_KEEPALIVE', 5)),
+    'TIMEOUT': int(os.environ.get('SERVER_TIMEOUT', 30)),
+    'GRACEFUL_TIMEOUT': int(os.environ.get('SERVER_GRACEFUL_TIMEOUT', 30)),
+    'MAX_REQUESTS': int(os.environ.get('SERVER_MAX_REQUESTS', 5000)),
+    'MAX_REQUESTS_JITTER': int(
+        os.environ.get('SERVER_MAX_REQUESTS_JITTER', 500)
+    ),
+    'MAX_MEMORY_GROWTH_MB': int(
+        os.environ.get('SERVER_MAX_MEMORY_GROWTH_MB', 256)
+    ),
+    'PIDFILE': os.environ.get('SERVER_PIDFILE', '/tmp/server.pid'),
+}
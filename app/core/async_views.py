@@ -0,0 +1,132 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from rest_framework import status
+
+from .authentication import cached_token_user
+
+# Accept values for which content negotiation picks the JSON renderer
+JSON_MEDIA_TYPES = ('*/*', 'application/*', 'application/json')
+
+
+def accepts_json(request):
+    """return whether the request negotiates plain, unindented JSON"""
+    if 'format' in request.GET:
+        return False
+
+    accept = request.META.get('HTTP_ACCEPT') or '*/*'
+    return all(
+        media_type.strip() in JSON_MEDIA_TYPES
+        for media_type in accept.split(',')
+    )
+
+
+def run_view(view, request, *args, **kwargs):
+    """run a synchronous view and render its response
+
+    Connections are checked before and after like around a regular
+    request, as the worker thread is not the one the handler manages.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+class AsyncReadMixin:
+    """serve reads from the event loop when they need no blocking I/O
+
+    With settings.ASYNC_API_VIEWS, as set by app.asgi, as_view returns a
+    coroutine view. GET requests for async_actions first go through
+    read_in_loop, which may only use in-process state: the locally
+    cached token and whatever the view keeps in memory. Everything else
+    runs the regular view in a worker thread of its own rather than the
+    single thread shared by synchronous code, so concurrent requests do
+    not queue behind each other.
+    """
+    async_actions = ('list', 'retrieve')
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        """return the regular view, or its async version under ASGI"""
+        view = super().as_view(*args, **kwargs)
+        if not settings.ASYNC_API_VIEWS:
+            return view
+
+        actions = getattr(view, 'actions', None)
+        action = actions.get('get') if actions else 'retrieve'
+
+        async def async_view(request, *args, **kwargs):
+            response = None
+            if request.method == 'GET' and action in cls.async_actions:
+                response = cls._read_in_loop(view, action, request,
+                                             args, kwargs)
+            if response is None:
+                response = await sync_to_async(
+                    run_view, thread_sensitive=False
+                )(view, request, *args, **kwargs)
+
+            return response
+
+        return functools.update_wrapper(async_view, view)
+
+    @classmethod
+    def _read_in_loop(cls, view, action, request, args, kwargs):
+        """set up a view instance and try read_in_loop"""
+        if cls.renderer_classes[0].media_type != 'application/json' \
+                or not accepts_json(request):
+            return None
+
+        user = cached_token_user(request)
+        if user is None:
+            return None
+
+        self = cls(**view.initkwargs)
+        for method, name in (getattr(view, 'actions', None) or {}).items():
+            setattr(self, method, getattr(self, name))
+        self.action_map = getattr(view, 'actions', None)
+        self.action = action
+        self.setup(request, *args, **kwargs)
+        self.format_kwarg = None
+
+        response = self.read_in_loop(request, user)
+        if response is None:
+            return None
+
+        return self.finalize_loop_response(response)
+
+    def read_in_loop(self, request, user):
+        """return a response without blocking, or None to run the view"""
+        return None
+
+    def loop_response(self, data=None, status_code=status.HTTP_200_OK):
+        """return a response with data rendered like the view would"""
+        response = HttpResponse(status=status_code)
+        if data is None:
+            del response['Content-Type']
+        else:
+            renderer = self.renderer_classes[0]()
+            response.content = renderer.render(data, renderer.media_type)
+            response['Content-Type'] = renderer.media_type
+
+        return response
+
+    def finalize_loop_response(self, response):
+        """add the headers finalize_response adds to view responses"""
+        headers = dict(self.default_response_headers)
+        vary = headers.pop('Vary', None)
+        for name, value in headers.items():
+            response[name] = value
+        if vary is not None:
+            patch_vary_headers(response, (vary,))
+
+        return response
@@ -0,0 +1,115 @@
+import copy
+import uuid
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, \
+    get_authorization_header
+
+from .cache import TieredCache
+
+
+token_cache = TieredCache(
+    max_entries=settings.TOKEN_AUTH_CACHE['MAX_ENTRIES'],
+    timeout=settings.TOKEN_AUTH_CACHE['TIMEOUT']
+    if settings.TOKEN_AUTH_CACHE['SHARED_CACHE'] else
+    min(settings.TOKEN_AUTH_CACHE['TIMEOUT'],
+        settings.TOKEN_AUTH_CACHE['LOCAL_TIMEOUT']),
+    shared=settings.TOKEN_AUTH_CACHE['SHARED_CACHE'],
+)
+
+
+def token_cache_key(key):
+    """return the cache key of an auth token"""
+    return f'auth-token:{key}'
+
+
+def _generation_key(key):
+    return f'auth-token-generation:{key}'
+
+
+def token_generation(key):
+    """return the generation of a token in the shared cache
+
+    It changes whenever the token is invalidated, and cached entries
+    only count while they carry the current one. None without a shared
+    cache.
+    """
+    if token_cache.shared is None:
+        return None
+
+    return token_cache.shared.get(_generation_key(key))
+
+
+def invalidate_tokens(keys):
+    """drop cached authentication for the given token keys"""
+    keys = list(keys)
+    token_cache.delete_many(token_cache_key(key) for key in keys)
+    if token_cache.shared is not None and keys:
+        # entries other processes hold locally now carry a stale one
+        token_cache.shared.set_many(
+            {_generation_key(key): uuid.uuid4().hex for key in keys},
+            timeout=None
+        )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """token authentication that caches the token and its user
+
+    Entries are dropped when the token is deleted or its user is saved,
+    see core.signals. With a shared cache, the token's generation is
+    checked there on every request, so other processes stop using their
+    local entries at once. Without one, their entries expire after
+    TOKEN_AUTH_CACHE['LOCAL_TIMEOUT'] seconds.
+    """
+
+    def authenticate_credentials(self, key):
+        """return the cached (user, token) or look it up and cache it"""
+        generation = token_generation(key)
+        entry = token_cache.get(token_cache_key(key))
+        if entry is not None and entry[1] == generation:
+            token = entry[0]
+        else:
+            _user, token = super().authenticate_credentials(key)
+            token_cache.set(token_cache_key(key), (token, generation))
+
+        # hand out a copy so views changing request.user do not change
+        # the cached instance shared with other requests
+        token = copy.deepcopy(token)
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        return (token.user, token)
+
+
+def cached_token_user(request):
+    """return the user of a request's token when it is cached locally
+
+    Never touches the database or a shared cache, so it can be called
+    from the event loop. None means regular authentication has to run,
+    always the case with a shared cache, as a revocation is only seen
+    by checking the token's generation there. The user is shared with
+    other requests and must not be changed.
+    """
+    if token_cache.shared is not None:
+        return None
+
+    auth = get_authorization_header(request).split()
+    keyword = CachedTokenAuthentication.keyword.lower().encode()
+    if len(auth) != 2 or auth[0].lower() != keyword:
+        return None
+
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        return None
+
+    entry = token_cache.local.get(token_cache_key(key))
+    if entry is None or not entry[0].user.is_active:
+        return None
+
+    return entry[0].user
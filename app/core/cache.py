@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+
+class LRUCache:
+    """thread safe in-process LRU cache with a per entry timeout
+
+    Mirrors the get/set/delete interface of Django cache backends so the
+    two can be used interchangeably.
+    """
+
+    def __init__(self, max_entries=1024, timeout=300):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """return the cached value or default when missing or expired"""
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, timeout=None):
+        """store a value, evicting the least recently used entry if full"""
+        timeout = self.timeout if timeout is None else timeout
+        expires = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """remove a key if present"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_many(self, keys):
+        """remove several keys"""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        """remove every entry and reset the statistics"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    """local LRU cache in front of an optional shared Django cache"""
+
+    def __init__(self, max_entries=1024, timeout=300, shared=None):
+        self.local = LRUCache(max_entries=max_entries, timeout=timeout)
+        self.shared_alias = shared
+        self.timeout = timeout
+
+    @property
+    def shared(self):
+        """return the shared Django cache, if one is configured"""
+        if self.shared_alias is None:
+            return None
+
+        return caches[self.shared_alias]
+
+    def get(self, key, default=None):
+        """look in the local cache first, then in the shared one"""
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return default if value is None else value
+
+        value = self.shared.get(key)
+        if value is None:
+            return default
+
+        self.local.set(key, value)
+        return value
+
+    def set(self, key, value, timeout=None):
+        """store a value in every tier"""
+        timeout = self.timeout if timeout is None else timeout
+        self.local.set(key, value, timeout)
+        if self.shared is not None:
+            self.shared.set(key, value, timeout)
+
+    def delete_many(self, keys):
+        """remove keys from every tier"""
+        keys = list(keys)
+        self.local.delete_many(keys)
+        if self.shared is not None:
+            self.shared.delete_many(keys)
+
+    def delete(self, key):
+        """remove a key from every tier"""
+        self.delete_many([key])
+
+    def clear(self):
+        """clear the local tier, the shared one may hold other data"""
+        self.local.clear()
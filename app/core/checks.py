@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# cache backends whose entries only the current process sees
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_replica_pin_cache(app_configs, **kwargs):
+    """warn when read-your-writes pins do not reach other processes"""
+    if not settings.REPLICA_DATABASES:
+        return []
+
+    backend = settings.CACHES[settings.REPLICA_PIN_CACHE]['BACKEND']
+    if backend not in PER_PROCESS_CACHES:
+        return []
+
+    return [Warning(
+        f'REPLICA_PIN_CACHE "{settings.REPLICA_PIN_CACHE}" is local to '
+        f'each process.',
+        hint='With several server processes a user who just wrote can '
+             'read a lagging replica, and the stale response is cached '
+             'under the new collection version. Point REPLICA_PIN_CACHE '
+             'at a cache every process reaches, such as memcached.',
+        id='core.W001',
+    )]
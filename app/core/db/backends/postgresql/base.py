@@ -0,0 +1,117 @@
+import functools
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db.pool import get_pool
+
+from .creation import DatabaseCreation
+
+
+def is_usable(conn):
+    """return whether a psycopg2 connection answers a query"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except base.Database.Error:
+        return False
+
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend with health checks and an optional pool
+
+    CONN_HEALTH_CHECKS makes a persistent connection answer a query
+    before its first use in a request, so one dropped by the server or
+    a proxy is replaced instead of failing the request.
+
+    With POOL, connections come from a pool shared by the threads of
+    the process and go back to it at the end of every request instead
+    of being kept per thread, which suits threaded and async workers
+    whose requests run in many short-lived threads.
+    """
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def get_pool(self, conn_params):
+        """return the pool for these parameters, or None without POOL"""
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+
+        key = repr(sorted(conn_params.items()))
+        return get_pool(key, conn_params.get('database', self.alias),
+                        options)
+
+    def get_new_connection(self, conn_params):
+        """take a connection from the pool, or open one"""
+        pool = self.get_pool(conn_params)
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        self.pool = pool
+        connection = pool.acquire(
+            functools.partial(super().get_new_connection, conn_params),
+            check=is_usable if self.health_check_enabled else None
+        )
+        # set by the parent for new connections, pooled ones keep theirs
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def _close(self):
+        """return a pooled connection, or close the connection"""
+        pool = self.pool
+        if pool is None:
+            return super()._close()
+
+        connection, self.pool = self.connection, None
+        try:
+            # closed inside atomic() the wrapper keeps the connection
+            if connection.closed or self.errors_occurred \
+                    or self.in_atomic_block:
+                pool.discard(connection)
+                return
+            if connection.get_transaction_status() != \
+                    extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except base.Database.Error:
+            pool.discard(connection)
+        else:
+            pool.release(connection)
+
+    def ensure_connection(self):
+        """check a reused persistent connection once per request"""
+        if self.connection is not None and self.health_check_enabled \
+                and not self.health_check_done and not self.in_atomic_block:
+            if not self.is_usable():
+                self.errors_occurred = True
+                self.close()
+            self.health_check_done = True
+
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        """called around requests: return pooled connections to the pool
+        and check persistent ones again in the next request
+        """
+        self.health_check_done = False
+        if self.pool is not None and not self.in_atomic_block:
+            self.close()
+            return
+
+        super().close_if_unusable_or_obsolete()
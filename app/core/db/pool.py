@@ -0,0 +1,216 @@
+import logging
+import threading
+import time
+
+from django.db.utils import OperationalError
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(OperationalError):
+    """no connection became available within the pool timeout"""
+
+
+class ConnectionPool:
+    """thread-safe pool of database connections with a size limit
+
+    Connections are created on demand up to max_size. Once all are in
+    use, acquire waits up to timeout seconds for one to be released.
+    Idle connections older than max_age seconds, or failing check, are
+    closed instead of handed out.
+    """
+
+    def __init__(self, name='default', max_size=10, timeout=30.0,
+                 max_age=None):
+        self.name = name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self._idle = []
+        self._created = {}
+        self._connecting = 0
+        self._available = threading.Condition(threading.Lock())
+        self.acquired = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.max_in_use = 0
+
+    @property
+    def size(self):
+        """return the number of open connections, idle or in use"""
+        return len(self._created) + self._connecting
+
+    @property
+    def in_use(self):
+        """return the number of connections handed out"""
+        return self.size - len(self._idle)
+
+    def _expired(self, conn):
+        return self.max_age is not None \
+            and time.monotonic() - self._created[conn] >= self.max_age
+
+    def acquire(self, connect, check=None):
+        """return an idle connection passing check, or one made with
+        connect()
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn = self._reserve(deadline)
+            if conn is None:
+                conn = self._connect(connect)
+                break
+            # checked outside the lock, as it is a round trip
+            if check is None or check(conn):
+                break
+            self.discard(conn)
+
+        with self._available:
+            self.acquired += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+        return conn
+
+    def _reserve(self, deadline):
+        """return an idle connection, or None with a slot reserved for a
+        new one, waiting until deadline when the pool is full
+        """
+        waited = False
+        with self._available:
+            try:
+                while True:
+                    conn = self._take_idle()
+                    if conn is not None:
+                        return conn
+                    if self.size < self.max_size:
+                        self._connecting += 1
+                        return None
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        logger.warning(
+                            'no database connection available after '
+                            '%.1fs, %d in use', self.timeout, self.in_use
+                        )
+                        raise PoolTimeout(
+                            f'No database connection available within '
+                            f'{self.timeout}s, all {self.max_size} are in use'
+                        )
+                    if not waited:
+                        waited = True
+                        self.waits += 1
+                        wait_start = time.monotonic()
+                    self._available.wait(remaining)
+            finally:
+                if waited:
+                    self.wait_seconds += time.monotonic() - wait_start
+
+    def _take_idle(self):
+        """pop the most recently used idle connection not expired yet"""
+        while self._idle:
+            conn = self._idle.pop()
+            if not self._expired(conn):
+                return conn
+            del self._created[conn]
+            self._close(conn)
+
+        return None
+
+    def _connect(self, connect):
+        """open a connection in the slot reserved by acquire"""
+        try:
+            conn = connect()
+        except BaseException:
+            with self._available:
+                self._connecting -= 1
+                self._available.notify()
+            raise
+
+        with self._available:
+            self._connecting -= 1
+            self._created[conn] = time.monotonic()
+
+        return conn
+
+    def release(self, conn):
+        """return a connection for reuse, or close it once expired"""
+        with self._available:
+            if self._expired(conn):
+                del self._created[conn]
+                self._close(conn)
+            else:
+                self._idle.append(conn)
+            self._available.notify()
+
+    def discard(self, conn):
+        """close a connection that must not be reused"""
+        with self._available:
+            self._created.pop(conn, None)
+            self._available.notify()
+        self._close(conn)
+
+    def close_idle(self):
+        """close every idle connection"""
+        with self._available:
+            idle, self._idle = self._idle, []
+            for conn in idle:
+                del self._created[conn]
+        for conn in idle:
+            self._close(conn)
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            logger.debug('closing a pooled connection failed', exc_info=True)
+
+    def stats(self):
+        """return the size and utilization of the pool"""
+        with self._available:
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'in_use': self.in_use,
+                'idle': len(self._idle),
+                'max_in_use': self.max_in_use,
+                'acquired': self.acquired,
+                'waits': self.waits,
+                'wait_seconds': round(self.wait_seconds, 6),
+                'timeouts': self.timeouts,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, name, options):
+    """return the pool for a set of connection parameters"""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                name=name,
+                max_size=options['MAX_SIZE'],
+                timeout=options['TIMEOUT'],
+                max_age=options['MAX_AGE'],
+            )
+
+    return pool
+
+
+def pool_stats():
+    """return the stats of every pool of this process by database name"""
+    with _pools_lock:
+        pools = list(_pools.values())
+
+    return {pool.name: pool.stats() for pool in pools}
+
+
+def close_pools():
+    """close the idle connections of every pool"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_idle()
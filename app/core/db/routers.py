@@ -0,0 +1,148 @@
+import contextvars
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# replica alias: time.monotonic() before which it is not tried again
+_down_until = {}
+
+
+class RoutingState:
+    """where the queries of the current request may read from"""
+
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.wrote = False
+        self.replica = None
+
+
+_state = contextvars.ContextVar('replica_routing', default=None)
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def is_pinned(user_id):
+    """return whether a user's reads stay on the primary after a write"""
+    cache = caches[settings.REPLICA_PIN_CACHE]
+    return cache.get(_pin_key(user_id)) is not None
+
+
+def pin(user_id):
+    """send a user's reads to the primary for REPLICA_PIN_SECONDS"""
+    cache = caches[settings.REPLICA_PIN_CACHE]
+    cache.set(_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def start_request(request):
+    """start routing the queries of an authenticated API request
+
+    Reads of safe requests go to a replica unless the user wrote within
+    REPLICA_PIN_SECONDS. Returns a token for end_request.
+    """
+    use_replicas = bool(settings.REPLICA_DATABASES) \
+        and request.method in ('GET', 'HEAD', 'OPTIONS') \
+        and not (request.user.is_authenticated
+                 and is_pinned(request.user.pk))
+
+    return _state.set(RoutingState(use_replicas))
+
+
+def end_request(token, request):
+    """pin the user to the primary if the request wrote anything"""
+    state = _state.get()
+    _state.reset(token)
+    if state.wrote and settings.REPLICA_DATABASES \
+            and request.user.is_authenticated:
+        pin(request.user.pk)
+
+
+def _connect_replica():
+    """return the alias of a replica that accepts connections, or None"""
+    aliases = [
+        alias for alias in settings.REPLICA_DATABASES
+        if _down_until.get(alias, 0) <= time.monotonic()
+    ]
+    random.shuffle(aliases)
+    for alias in aliases:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            logger.warning('replica %s is unavailable, reading from the '
+                           'primary', alias, exc_info=True)
+            _down_until[alias] = \
+                time.monotonic() + settings.REPLICA_RETRY_SECONDS
+            continue
+        return alias
+
+    return None
+
+
+class ReplicaRouter:
+    """send reads of safe API requests to the replicas
+
+    Outside requests started with start_request, after a write in the
+    same request, and inside transactions on the primary, every query
+    goes to the primary. A request reads from a single replica, picked
+    at random among those accepting connections; when none does, it
+    reads from the primary and failed replicas are skipped for
+    REPLICA_RETRY_SECONDS.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replicas or state.wrote \
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        if state.replica is None:
+            state.replica = _connect_replica() or DEFAULT_DB_ALIAS
+
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+
+        # never the replica an instance was read from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """route the queries of an API view with ReplicaRouter
+
+    Routing starts once the request is authenticated, so token lookups
+    always read from the primary and see tokens created moments ago.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._routing_token = start_request(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_routing_token', None)
+        if token is not None:
+            self._routing_token = None
+            end_request(token, request)
+
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,58 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_pool_thread = threading.local()
+
+
+def get_hash_executor():
+    """return the bounded thread pool password hashing runs on"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix='password-hash',
+                initializer=_mark_pool_thread
+            )
+
+    return _executor
+
+
+def _mark_pool_thread():
+    """flag pool threads so nested hashing does not wait on the pool"""
+    _pool_thread.active = True
+
+
+def run_hashing(func, *args, **kwargs):
+    """run a hashing function on the pool and wait for its result
+
+    Bounds the number of concurrent hashes to PASSWORD_HASH_WORKERS no
+    matter how many request threads are logging in.
+    """
+    if getattr(_pool_thread, 'active', False):
+        return func(*args, **kwargs)
+
+    return get_hash_executor().submit(func, *args, **kwargs).result()
+
+
+class PooledPBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 hasher with a configurable cost, run on the hashing pool
+
+    Keeps the pbkdf2_sha256 algorithm name so existing hashes verify and
+    are upgraded on login when PASSWORD_HASH_ITERATIONS changes.
+    """
+
+    @property
+    def iterations(self):
+        """return the iteration count configured for this environment"""
+        return settings.PASSWORD_HASH_ITERATIONS
+
+    def encode(self, password, salt, iterations=None):
+        """hash the password on the hashing pool"""
+        return run_hashing(super().encode, password, salt, iterations)
@@ -0,0 +1,234 @@
+import asyncio
+import importlib
+import io
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import clear_url_caches
+
+from rest_framework.authtoken.models import Token
+
+from core.db.pool import pool_stats
+from core.models import Tag, Ingredient, Recipe
+
+URLCONF_MODULES = ('recipe.urls', 'user.urls')
+
+
+@contextmanager
+def api_views(async_views):
+    """build the URLconf with sync or async API views"""
+    def reload():
+        for name in URLCONF_MODULES + (settings.ROOT_URLCONF,):
+            if name in sys.modules:
+                importlib.reload(sys.modules[name])
+        clear_url_caches()
+
+    try:
+        with override_settings(ASYNC_API_VIEWS=async_views):
+            reload()
+            yield
+    finally:
+        reload()
+
+
+class Command(BaseCommand):
+    """Django command to compare API throughput under WSGI and ASGI"""
+
+    help = 'Load test the read API through the WSGI and ASGI handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int,
+                            default=(os.cpu_count() or 1) * 8,
+                            help='requests in flight')
+        parser.add_argument('--recipes', type=int, default=50)
+        parser.add_argument('--host', default=None,
+                            help='Host header, an allowed host by default')
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        # requests run on other threads and connections, so the rows are
+        # committed and deleted afterwards instead of rolled back
+        self.host = options['host'] or self._allowed_host()
+        user, key = self._seed(options)
+        try:
+            paths = self._paths(user)
+            for name, run in (('WSGI', self._run_wsgi),
+                              ('ASGI', self._run_asgi)):
+                with api_views(async_views=name == 'ASGI'):
+                    # one round to warm the token and response caches
+                    run(paths, key, len(paths), 1)
+                    elapsed, latencies, statuses = run(
+                        paths, key, options['requests'],
+                        options['concurrency']
+                    )
+                self._report(name, options, elapsed, latencies, statuses)
+                self._report_pools()
+        finally:
+            user.delete()
+
+    def _allowed_host(self):
+        """return a host name the requests pass host validation with"""
+        for host in settings.ALLOWED_HOSTS:
+            if host != '*' and not host.startswith('.'):
+                return host
+
+        return 'localhost'
+
+    def _seed(self, options):
+        """create a user with a token, tags, ingredients and recipes"""
+        user = get_user_model().objects.create(
+            email='handlers@benchmark.local'
+        )
+        tag = Tag.objects.create(user=user, name='Benchmark')
+        ingredient = Ingredient.objects.create(user=user, name='Benchmark')
+        for i in range(options['recipes']):
+            recipe = Recipe.objects.create(
+                user=user,
+                title=f'Recipe {i}',
+                time_minutes=i % 120 + 1,
+                price=i % 50 + 1
+            )
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+
+        return user, Token.objects.create(user=user).key
+
+    def _paths(self, user):
+        """return the read endpoints to cycle through"""
+        recipe = Recipe.objects.filter(user=user).first()
+        return (
+            '/api/recipe/tags/',
+            '/api/recipe/ingredient/',
+            '/api/recipe/recipe/',
+            f'/api/recipe/recipe/{recipe.id}/',
+            '/api/user/me/',
+        )
+
+    def _environ(self, path, key):
+        """return a WSGI environ for an authenticated GET"""
+        return {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '80',
+            'HTTP_HOST': self.host,
+            'HTTP_ACCEPT': 'application/json',
+            'HTTP_AUTHORIZATION': f'Token {key}',
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+        }
+
+    def _run_wsgi(self, paths, key, count, concurrency):
+        """issue count requests from concurrency threads"""
+        handler = WSGIHandler()
+
+        def request(i):
+            statuses = []
+            start = time.perf_counter()
+            response = handler(
+                self._environ(paths[i % len(paths)], key),
+                lambda status, headers: statuses.append(status)
+            )
+            b''.join(response)
+            response.close()
+            return time.perf_counter() - start, int(statuses[0][:3])
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(request, range(count)))
+        elapsed = time.perf_counter() - start
+
+        return elapsed, [r[0] for r in results], [r[1] for r in results]
+
+    def _run_asgi(self, paths, key, count, concurrency):
+        """issue count requests from concurrency tasks on one loop"""
+        application = get_asgi_application()
+        results = []
+
+        async def request(i):
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': paths[i % len(paths)],
+                'raw_path': paths[i % len(paths)].encode(),
+                'query_string': b'',
+                'root_path': '',
+                'headers': [
+                    (b'host', self.host.encode()),
+                    (b'accept', b'application/json'),
+                    (b'authorization', f'Token {key}'.encode()),
+                ],
+                'client': ('127.0.0.1', 0),
+                'server': (self.host, 80),
+            }
+            messages = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                messages.append(message)
+
+            start = time.perf_counter()
+            await application(scope, receive, send)
+            results.append(
+                (time.perf_counter() - start, messages[0]['status'])
+            )
+
+        async def worker(numbers):
+            for i in numbers:
+                await request(i)
+
+        async def run():
+            numbers = iter(range(count))
+            await asyncio.gather(
+                *(worker(numbers) for _ in range(concurrency))
+            )
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+        return elapsed, [r[0] for r in results], [r[1] for r in results]
+
+    def _report_pools(self):
+        """print the utilization of the database connection pools"""
+        for database, stats in pool_stats().items():
+            self.stdout.write(
+                f'  {database} pool: {stats["max_in_use"]} of '
+                f'{stats["max_size"]} connections used at most, '
+                f'{stats["waits"]} waits for {stats["wait_seconds"]:.3f}s, '
+                f'{stats["timeouts"]} timeouts'
+            )
+
+    def _report(self, name, options, elapsed, latencies, statuses):
+        """print throughput and latency percentiles"""
+        errors = sum(1 for status in statuses if status != 200)
+        if errors:
+            self.stderr.write(f'{name}: {errors} responses were not 200')
+        latencies = sorted(latencies)
+        p50 = statistics.median(latencies)
+        p99 = latencies[min(len(latencies) - 1,
+                            int(len(latencies) * 0.99))]
+        self.stdout.write(self.style.SUCCESS(
+            f'{name}: {options["requests"]} requests, '
+            f'{options["concurrency"]} in flight: '
+            f'{len(latencies) / elapsed:.1f}/s, '
+            f'p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms'
+        ))
@@ -0,0 +1,52 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Django command to measure password checking throughput per core"""
+
+    help = 'Measure login password checks per second and per core'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument('--threads', type=int,
+                            default=(os.cpu_count() or 1) * 4,
+                            help='concurrent login requests')
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        cores = os.cpu_count() or 1
+        encoded = make_password('benchmarkPass123')
+
+        start = time.perf_counter()
+        check_password('benchmarkPass123', encoded)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            results = list(pool.map(
+                lambda _: check_password('benchmarkPass123', encoded),
+                range(options['logins'])
+            ))
+        elapsed = time.perf_counter() - start
+
+        if not all(results):
+            self.stderr.write('Password check failed')
+            return
+
+        throughput = options['logins'] / elapsed
+        self.stdout.write(
+            f'hasher: {settings.PASSWORD_HASHERS[0]}, '
+            f'iterations: {settings.PASSWORD_HASH_ITERATIONS}, '
+            f'hash workers: {settings.PASSWORD_HASH_WORKERS}, cores: {cores}'
+        )
+        self.stdout.write(f'single login: {single * 1000:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["logins"]} logins from {options["threads"]} threads: '
+            f'{throughput:.1f}/s, {throughput / cores:.1f}/s per core'
+        ))
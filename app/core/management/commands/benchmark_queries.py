@@ -0,0 +1,197 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Tag, Ingredient, Recipe
+
+
+class Command(BaseCommand):
+    """Django command to seed a large dataset and explain hot path queries"""
+
+    help = 'Seed benchmark data, print query plans and timings, roll back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--recipes', type=int, default=5000,
+                            help='recipes per user')
+        parser.add_argument('--attrs', type=int, default=200,
+                            help='tags and ingredients per user')
+        parser.add_argument('--links', type=int, default=5,
+                            help='tags and ingredients per recipe')
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--strict', action='store_true',
+                            help='fail when a plan skips its index')
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        with transaction.atomic():
+            self.stdout.write('Seeding benchmark data...')
+            user = self._seed(options)
+            self._analyze()
+            missing = self._report(user, options)
+            # never leave the benchmark rows behind
+            transaction.set_rollback(True)
+
+        if missing and options['strict']:
+            raise CommandError(
+                'Indexes not used by: ' + ', '.join(missing)
+            )
+
+    def _seed(self, options):
+        """create users with recipes, tags and ingredients"""
+        rnd = random.Random(0)
+        users = []
+        for i in range(options['users']):
+            user = get_user_model()(email=f'bench{i}@benchmark.local')
+            user.set_unusable_password()
+            users.append(user)
+        get_user_model().objects.bulk_create(users)
+        users = get_user_model().objects.filter(
+            email__endswith='@benchmark.local'
+        )
+
+        for user in users:
+            for model in (Tag, Ingredient):
+                model.objects.bulk_create(
+                    [model(user=user, name=f'{model.__name__} {i:05d}')
+                     for i in range(options['attrs'])],
+                    batch_size=1000
+                )
+            Recipe.objects.bulk_create(
+                [Recipe(user=user, title=f'Recipe {i}',
+                        time_minutes=rnd.randint(1, 240),
+                        price=rnd.randint(100, 99999) / 100)
+                 for i in range(options['recipes'])],
+                batch_size=1000
+            )
+            self._link(rnd, user, 'tags', Tag, options['links'])
+            self._link(rnd, user, 'ingredients', Ingredient, options['links'])
+
+        return users[0]
+
+    def _link(self, rnd, user, field, model, links):
+        """attach random related objects to every recipe of a user"""
+        through = getattr(Recipe, field).through
+        related = f'{model.__name__.lower()}_id'
+        related_ids = list(
+            model.objects.filter(user=user).values_list('id', flat=True)
+        )
+        recipe_ids = Recipe.objects.filter(
+            user=user
+        ).values_list('id', flat=True)
+
+        rows = [
+            through(recipe_id=recipe_id, **{related: related_id})
+            for recipe_id in recipe_ids
+            for related_id in rnd.sample(
+                related_ids, min(links, len(related_ids))
+            )
+        ]
+        through.objects.bulk_create(rows, batch_size=5000)
+
+    def _analyze(self):
+        """refresh planner statistics for the seeded tables"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def get_benchmarks(self, user, page_size):
+        """return (name, queryset, expected index) for each hot path"""
+        tag_ids = list(Tag.objects.filter(user=user).values_list(
+            'id', flat=True
+        )[:3])
+        ingredient_ids = list(Ingredient.objects.filter(
+            user=user
+        ).values_list('id', flat=True)[:3])
+
+        return [
+            ('tags by name',
+             Tag.objects.filter(user=user).order_by('-name', '-id')[
+                 :page_size],
+             'core_tag_user_name_idx'),
+            ('ingredients by name',
+             Ingredient.objects.filter(user=user).order_by('-name', '-id')[
+                 :page_size],
+             'core_ingredient_user_name_idx'),
+            ('recipes newest first',
+             Recipe.objects.filter(user=user).order_by('-id')[:page_size],
+             'core_recipe_user_id_idx'),
+            ('recipes by tag',
+             Recipe.tags.through.objects.filter(
+                 tag_id__in=tag_ids
+             ).values('recipe_id'),
+             'core_recipe_tags_tag_recipe_idx'),
+            ('recipes by ingredient',
+             Recipe.ingredients.through.objects.filter(
+                 ingredient_id__in=ingredient_ids
+             ).values('recipe_id'),
+             'core_recipe_ingr_ingr_recipe_idx'),
+            ('recipes with any tag',
+             Recipe.objects.filter(user=user).filter_related(
+                 'tags', tag_ids
+             ).order_by('-id')[:page_size],
+             'core_recipe_user_id_idx'),
+            ('recipes with all ingredients',
+             Recipe.objects.filter(user=user).filter_related(
+                 'ingredients', ingredient_ids[:2], 'all'
+             ).order_by('-id')[:page_size],
+             'core_recipe_ingr_ingr_recipe_idx'),
+            ('recipes under 30 minutes, quickest first',
+             Recipe.objects.filter(
+                 user=user, time_minutes__lte=30
+             ).order_by('time_minutes', 'id')[:page_size],
+             'core_recipe_user_time_idx'),
+            ('recipes between $5 and $10, cheapest first',
+             Recipe.objects.filter(
+                 user=user, price__gte=5, price__lte=10
+             ).order_by('price', 'id')[:page_size],
+             'core_recipe_user_price_idx'),
+            # the cursor of the next page only needs the index columns
+            ('recipe ids under $10, most expensive first',
+             Recipe.objects.filter(
+                 user=user, price__lte=10
+             ).order_by('-price', '-id').values_list('price', 'id')[
+                 :page_size],
+             'core_recipe_user_price_idx'),
+            ('assigned tags with counts',
+             Tag.objects.filter(user=user).assigned().with_recipe_count(
+             ).order_by('-name', '-id')[:page_size],
+             'core_tag_user_name_idx'),
+        ]
+
+    def _report(self, user, options):
+        """explain and time every benchmark, return those missing indexes"""
+        missing = []
+        for name, queryset, index in self.get_benchmarks(
+            user, options['page_size']
+        ):
+            plan = queryset.explain()
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+
+            used = index in plan
+            if not used:
+                missing.append(name)
+
+            # PostgreSQL and SQLite wording for scans that skip the table
+            index_only = any(
+                index in line and ('Index Only Scan' in line or
+                                   'COVERING INDEX' in line)
+                for line in plan.splitlines()
+            )
+            style = self.style.SUCCESS if used else self.style.WARNING
+            self.stdout.write(style(
+                f'{name}: {statistics.median(timings):.2f} ms median, '
+                f'{"uses" if used else "does not use"} {index}'
+                f'{" (index only)" if used and index_only else ""}'
+            ))
+            self.stdout.write(plan)
+
+        return missing
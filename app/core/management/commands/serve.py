@@ -0,0 +1,86 @@
+import os
+import shlex
+import shutil
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.serving import server_options
+
+CONFIG = 'python:app.gunicorn_conf'
+
+
+class Command(BaseCommand):
+    """Django command to run the production server"""
+
+    help = 'Run gunicorn with worker processes sized from the cores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--asgi', action='store_true',
+                            help='serve app.asgi with uvicorn workers')
+        parser.add_argument('--reload', action='store_true',
+                            help='gracefully reload a running server')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='print the command and settings only')
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if options['reload']:
+            return self._reload()
+
+        server = dict(settings.SERVER, ASGI=options['asgi'] or
+                      settings.SERVER['ASGI'])
+        config = server_options(server)
+        self._check(config)
+
+        argv = ['gunicorn', '--config', CONFIG,
+                'app.asgi:application' if server['ASGI']
+                else 'app.wsgi:application']
+        self.stdout.write(' '.join(shlex.quote(arg) for arg in argv))
+        for name, value in sorted(config.items()):
+            self.stdout.write(f'  {name}: {value}')
+        if options['dry_run']:
+            return
+
+        if shutil.which('gunicorn') is None:
+            raise CommandError('gunicorn is not installed')
+        # read by the gunicorn configuration in the server process
+        os.environ['SERVER_ASGI'] = '1' if server['ASGI'] else '0'
+        if server['ASGI']:
+            os.environ['ASYNC_API_VIEWS'] = '1'
+        os.execvp(argv[0], argv)
+
+    def _check(self, config):
+        """warn about settings that do not suit several processes"""
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING(
+                'DEBUG is on, every query is kept in memory, set DEBUG=0'
+            ))
+        if config['workers'] > 1 and not self._response_cache_shared():
+            self.stderr.write(self.style.WARNING(
+                'RESPONSE_CACHE versions are local to each worker, so '
+                'workers serve stale responses and validators; set '
+                'RESPONSE_CACHE_SHARED_CACHE to a cache all processes '
+                'reach, such as memcached'
+            ))
+
+    def _response_cache_shared(self):
+        """return whether all workers see the same response versions"""
+        alias = settings.RESPONSE_CACHE['SHARED_CACHE']
+        return not settings.CACHES[alias]['BACKEND'].endswith(
+            '.LocMemCache'
+        )
+
+    def _reload(self):
+        """send SIGHUP to the running server to replace its workers"""
+        try:
+            with open(settings.SERVER['PIDFILE']) as pidfile:
+                pid = int(pidfile.read().strip())
+            os.kill(pid, signal.SIGHUP)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'no running server to reload: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Reloading server {pid}, workers finish their requests first'
+        ))
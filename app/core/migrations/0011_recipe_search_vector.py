@@ -0,0 +1,56 @@
+# Generated by Django 3.2.25 on 2026-10-18 21:05
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+RELATED_NAMES = (
+    "coalesce((SELECT string_agg(t.name, ' ') FROM core_recipe_tags rt "
+    "JOIN core_tag t ON t.id = rt.tag_id WHERE rt.recipe_id = r.id), '')",
+    "coalesce((SELECT string_agg(i.name, ' ') "
+    "FROM core_recipe_ingredients ri "
+    "JOIN core_ingredient i ON i.id = ri.ingredient_id "
+    "WHERE ri.recipe_id = r.id), '')",
+)
+
+
+def create_search_index(apps, schema_editor):
+    """add the GIN index and fill in existing recipes, PostgreSQL only"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    config = settings.RECIPE_SEARCH_CONFIG
+    schema_editor.execute(
+        'CREATE INDEX core_recipe_search_vector_idx '
+        'ON core_recipe USING gin (search_vector)'
+    )
+    schema_editor.execute(
+        'UPDATE core_recipe r SET search_vector = '
+        "setweight(to_tsvector(%s::regconfig, r.title), 'A') || "
+        f"setweight(to_tsvector(%s::regconfig, {RELATED_NAMES[0]}), 'B') || "
+        f"setweight(to_tsvector(%s::regconfig, {RELATED_NAMES[1]}), 'B')",
+        (config, config, config)
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX core_recipe_search_vector_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_image_content_addressed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.25 on 2026-10-18 22:10
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# name serves similarity (%) lookups, UPPER(name) the icontains and
+# istartswith lookups, which Django compiles to UPPER(name) LIKE UPPER(...)
+TRIGRAM_INDEXES = (
+    ('core_tag_name_trgm_idx', 'core_tag', 'name'),
+    ('core_tag_upper_name_trgm_idx', 'core_tag', '(UPPER(name::text))'),
+    ('core_ingredient_name_trgm_idx', 'core_ingredient', 'name'),
+    ('core_ingredient_upper_name_trgm_idx', 'core_ingredient',
+     '(UPPER(name::text))'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """index names for similarity and LIKE lookups, PostgreSQL only"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for name, table, expression in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX {name} ON {table} '
+            f'USING gin ({expression} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipe_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
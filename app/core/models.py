@@ -1,19 +1,43 @@
+import hashlib
 import uuid
 import os
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
                                         PermissionsMixin
 from django.conf import settings
 
+from .storage import ContentAddressedStorage
+
 
 def recipe_image_file_path(instance, filename):
-    """generate file path for new recipe image"""
-    ext = filename.split('.')[-1]
-    filename = f'{uuid.uuid4()}.{ext}'
+    """generate file path for new recipe image
+
+    Names are the SHA-256 of the image content, so identical uploads
+    share one file.
+    """
+    ext = filename.split('.')[-1].lower()
+    content = getattr(instance, 'image', None)
+    if content:
+        filename = f'{file_digest(content)}.{ext}'
+    else:
+        filename = f'{uuid.uuid4()}.{ext}'
 
     return os.path.join('uploads/recipe/', filename)
 
 
+def file_digest(file):
+    """return the SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+
+    return digest.hexdigest()
+
+
 class UserManager(BaseUserManager):
 
     def create_user(self, email, password=None, **kwargs):
@@ -37,6 +61,64 @@ class UserManager(BaseUserManager):
         return user
 
 
+class RecipeAttrQuerySet(models.QuerySet):
+    """queryset shared by the objects recipes are tagged with"""
+
+    def _recipe_links(self):
+        """return the through table rows linking each object to recipes"""
+        rel = self.model._meta.get_field('recipe')
+        related_id = rel.field.m2m_reverse_name()
+
+        return rel.through.objects.filter(
+            **{related_id: models.OuterRef('pk')}
+        ), related_id
+
+    def assigned(self):
+        """filter objects used by at least one recipe"""
+        links, _ = self._recipe_links()
+
+        return self.filter(models.Exists(links))
+
+    def with_recipe_count(self):
+        """annotate the number of recipes using each object"""
+        links, related_id = self._recipe_links()
+        counts = links.order_by().values(related_id).annotate(
+            count=models.Count('*')
+        ).values('count')
+
+        return self.annotate(
+            recipe_count=Coalesce(models.Subquery(counts), 0)
+        )
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def filter_related(self, field, ids, match='any'):
+        """filter recipes linked to any or all of the given related ids
+
+        Uses semi-joins on the through table instead of joining it, so a
+        recipe matching several ids is returned once.
+        """
+        m2m = self.model._meta.get_field(field)
+        recipe_id = m2m.m2m_column_name()
+        ids = set(ids)
+        links = m2m.remote_field.through.objects.filter(
+            **{f'{m2m.m2m_reverse_name()}__in': ids}
+        )
+
+        if match == 'all':
+            # the through table is unique on (recipe, related), so a recipe
+            # has every id exactly when it has one row per id
+            recipe_ids = links.values(recipe_id).annotate(
+                matched=models.Count('id')
+            ).filter(matched=len(ids)).values(recipe_id)
+            return self.filter(pk__in=recipe_ids)
+
+        return self.filter(models.Exists(
+            links.filter(**{recipe_id: models.OuterRef('pk')})
+        ))
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     """custom user model that supports using email instead of username"""
     email = models.EmailField(max_length=255, unique=True)
@@ -55,6 +137,15 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    objects = RecipeAttrQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'name', 'id'],
+                name='core_tag_user_name_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -67,6 +158,15 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    objects = RecipeAttrQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'name', 'id'],
+                name='core_ingredient_user_name_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -80,11 +180,35 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=ContentAddressedStorage()
+    )
+    # title, tag and ingredient names, maintained by recipe.search
+    search_vector = SearchVectorField(null=True, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'id'],
+                name='core_recipe_user_id_idx'
+            ),
+            # range filters and ordering, id keeps the order stable
+            models.Index(
+                fields=['user', 'time_minutes', 'id'],
+                name='core_recipe_user_time_idx'
+            ),
+            models.Index(
+                fields=['user', 'price', 'id'],
+                name='core_recipe_user_price_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -0,0 +1,49 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON renderer using orjson when it is installed
+
+    Produces the same bytes as JSONRenderer for compact UTF-8 output of
+    strings, integers and containers, floats may be spelled differently.
+    Falls back to it without orjson, for indented or ASCII output, and
+    for anything orjson cannot encode.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """render data to JSON bytes"""
+        if orjson is None or data is None or not self.compact \
+                or self.ensure_ascii:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME |
+                orjson.OPT_NON_STR_KEYS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        # escaped like JSONRenderer so the output stays a javascript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028') \
+                .replace(b'\xe2\x80\xa9', b'\\u2029')
+
+        return ret
@@ -0,0 +1,93 @@
+import logging
+import os
+import resource
+import signal
+
+logger = logging.getLogger(__name__)
+
+# the threaded worker, unlike gunicorn's plain sync one, keeps connections
+# alive between requests
+SYNC_WORKER_CLASS = 'gthread'
+ASGI_WORKER_CLASS = 'uvicorn.workers.UvicornWorker'
+
+
+def available_cores():
+    """return the number of cores this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count(asgi=False, cores=None):
+    """return the number of server processes for the available cores
+
+    Synchronous workers block on the database for part of every request,
+    so two per core plus one keep the cores busy. ASGI workers overlap
+    their own requests and get one per core.
+    """
+    cores = cores or available_cores()
+    if asgi:
+        return cores
+
+    return 2 * cores + 1
+
+
+def rss_bytes():
+    """return the resident memory of this process"""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # peak rather than current size, in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryRecycler:
+    """stop a worker gracefully once its memory grew past a limit
+
+    Connected to request_finished in every worker, so the check runs
+    between requests. SIGTERM lets the worker finish what it is serving
+    and the server master starts a fresh one in its place.
+    """
+
+    def __init__(self, max_growth_bytes, measure=rss_bytes):
+        self.max_growth_bytes = max_growth_bytes
+        self.measure = measure
+        self.baseline = measure()
+        self.stopping = False
+
+    def __call__(self, **kwargs):
+        """request_finished receiver checking the growth"""
+        if self.stopping or not self.max_growth_bytes:
+            return
+
+        growth = self.measure() - self.baseline
+        if growth > self.max_growth_bytes:
+            self.stopping = True
+            logger.warning(
+                'worker %s grew %d MB since it started, recycling',
+                os.getpid(), growth // (1024 * 1024)
+            )
+            os.kill(os.getpid(), signal.SIGTERM)
+
+
+def server_options(server, cores=None):
+    """return gunicorn settings for the SERVER setting"""
+    asgi = server['ASGI']
+    options = {
+        'bind': server['BIND'],
+        'workers': server['WORKERS'] or worker_count(asgi, cores),
+        'worker_class': ASGI_WORKER_CLASS if asgi else SYNC_WORKER_CLASS,
+        'keepalive': server['KEEPALIVE'],
+        'timeout': server['TIMEOUT'],
+        'graceful_timeout': server['GRACEFUL_TIMEOUT'],
+        'max_requests': server['MAX_REQUESTS'],
+        'max_requests_jitter': server['MAX_REQUESTS_JITTER'],
+        'pidfile': server['PIDFILE'],
+    }
+    if not asgi:
+        options['threads'] = server['THREADS']
+
+    return options
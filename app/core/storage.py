@@ -0,0 +1,51 @@
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """file system storage for files named after a hash of their content
+
+    A name that already exists holds the same bytes, so saving it again
+    only refreshes its modification time instead of writing a copy.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        """keep the content derived name, duplicates share one file"""
+        return name
+
+    def _save(self, name, content):
+        """write new content, reuse the file when it is already stored
+
+        The content goes to a temporary file first and is then linked
+        under its name, which fails when the name exists. Concurrent
+        saves of the same content therefore never overwrite each other
+        or expose a partly written file.
+        """
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        tmp_path = os.path.join(directory, f'.tmp-{uuid.uuid4().hex}')
+        # 0o666 less the umask, like FileSystemStorage
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL |
+                     getattr(os, 'O_BINARY', 0), 0o666)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            try:
+                os.link(tmp_path, full_path)
+            except FileExistsError:
+                # mark the file as recently referenced, cleanup skips
+                # files inside its grace period
+                os.utime(full_path)
+        finally:
+            os.remove(tmp_path)
+
+        return str(name).replace('\\', '/')
@@ -0,0 +1,172 @@
+import asyncio
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory, TransactionTestCase, \
+    override_settings
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.async_views import accepts_json
+from core.authentication import token_cache
+from core.models import Tag, Recipe
+
+from recipe.cache import response_cache
+from recipe.views import TagViewSet
+from user.views import CreateTokenView, ManageUserView
+
+TAGS_PATH = '/api/recipe/tags/'
+ME_PATH = '/api/user/me/'
+TOKEN_PATH = '/api/user/token/'
+
+
+@override_settings(ASYNC_API_VIEWS=True)
+class AsyncViewsTests(TransactionTestCase):
+    """test the async views served under ASGI"""
+
+    def setUp(self):
+        token_cache.clear()
+        response_cache.clear()
+        self.factory = RequestFactory()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        Tag.objects.create(user=self.user, name='Vegan')
+
+    def _get(self, view, path, **extra):
+        """run an async view for an authenticated GET"""
+        request = self.factory.get(
+            path,
+            HTTP_AUTHORIZATION=f'Token {self.token.key}',
+            **extra
+        )
+        return async_to_sync(view)(request)
+
+    def test_views_are_coroutines(self):
+        """test as_view returns coroutine functions only when enabled"""
+        view = TagViewSet.as_view({'get': 'list'})
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+
+        with override_settings(ASYNC_API_VIEWS=False):
+            view = TagViewSet.as_view({'get': 'list'})
+        self.assertFalse(asyncio.iscoroutinefunction(view))
+
+    def test_cached_list_served_in_loop(self):
+        """test a cached list is answered without the database"""
+        view = TagViewSet.as_view({'get': 'list'})
+        first = self._get(view, TAGS_PATH)
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            res = self._get(view, TAGS_PATH)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-Cache'], 'HIT')
+        self.assertEqual(res.content, first.content)
+        for header in ('Content-Type', 'ETag', 'Last-Modified',
+                       'Cache-Control', 'Vary', 'Allow'):
+            self.assertEqual(res[header], first[header])
+
+    def test_not_modified_served_in_loop(self):
+        """test conditional requests are answered without the database"""
+        view = TagViewSet.as_view({'get': 'list'})
+        etag = self._get(view, TAGS_PATH)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self._get(view, TAGS_PATH, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertNotIn('Content-Type', res)
+
+    def test_uncached_reads_run_view(self):
+        """test reads the loop cannot answer still run the view"""
+        view = TagViewSet.as_view({'get': 'list'})
+
+        res = self._get(view, TAGS_PATH, HTTP_ACCEPT='text/html')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('text/html', res['Content-Type'])
+
+        request = self.factory.get(TAGS_PATH)
+        res = async_to_sync(view)(request)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_manage_user_served_in_loop(self):
+        """test the user of a cached token is retrieved in the loop"""
+        view = ManageUserView.as_view()
+        first = self._get(view, ME_PATH)
+
+        with self.assertNumQueries(0):
+            res = self._get(view, ME_PATH)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, first.content)
+        self.assertEqual(res['Allow'], first['Allow'])
+        self.assertEqual(res['Vary'], first['Vary'])
+
+    def test_writes_run_view(self):
+        """test other methods run the view in a worker thread"""
+        view = ManageUserView.as_view()
+        request = self.factory.patch(
+            ME_PATH,
+            data='{"name": "New name"}',
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+        res = async_to_sync(view)(request)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'New name')
+
+    def test_login_runs_view(self):
+        """test logging in checks the password off the event loop"""
+        view = CreateTokenView.as_view()
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        request = self.factory.post(
+            TOKEN_PATH,
+            data='{"email": "test@tru.com", "password": "testPass123"}',
+            content_type='application/json'
+        )
+        res = async_to_sync(view)(request)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['token'], self.token.key)
+
+    def test_accepts_json(self):
+        """test which requests negotiate the JSON renderer"""
+        self.assertTrue(accepts_json(self.factory.get(TAGS_PATH)))
+        self.assertTrue(accepts_json(self.factory.get(
+            TAGS_PATH, HTTP_ACCEPT='application/json'
+        )))
+        self.assertFalse(accepts_json(self.factory.get(
+            TAGS_PATH, HTTP_ACCEPT='text/html,*/*'
+        )))
+        self.assertFalse(accepts_json(self.factory.get(
+            TAGS_PATH, {'format': 'api'}
+        )))
+
+
+class BenchmarkHandlersTests(TransactionTestCase):
+    """test the WSGI and ASGI load test"""
+
+    def test_benchmark_handlers(self):
+        """test both handlers are reported and no data is left"""
+        out = StringIO()
+        err = StringIO()
+        call_command(
+            'benchmark_handlers',
+            requests=10, concurrency=2, recipes=2,
+            stdout=out, stderr=err
+        )
+
+        self.assertIn('WSGI: 10 requests', out.getvalue())
+        self.assertIn('ASGI: 10 requests', out.getvalue())
+        self.assertIn('p99', out.getvalue())
+        self.assertEqual(err.getvalue(), '')
+        self.assertFalse(Recipe.objects.exists())
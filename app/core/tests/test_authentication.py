@@ -0,0 +1,187 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import cached_token_user, invalidate_tokens, \
+    token_cache, token_cache_key
+from core.cache import LRUCache
+
+
+ME_URL = reverse('user:me')
+
+
+class LRUCacheTests(TestCase):
+    """test the in-process LRU cache"""
+
+    def test_evicts_least_recently_used(self):
+        """test the oldest unused entry is evicted when full"""
+        cache = LRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    @patch('time.monotonic')
+    def test_entries_expire(self, monotonic):
+        """test entries are not returned after their timeout"""
+        monotonic.return_value = 100
+        cache = LRUCache(timeout=10)
+        cache.set('a', 1)
+
+        monotonic.return_value = 111
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.misses, 1)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """test token authentication served from the cache"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123',
+            name='Test'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_cached(self):
+        """test the token is only looked up on the first request"""
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_rejected(self):
+        """test a deleted token stops authenticating"""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """test a deactivated user stops authenticating"""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_user_refreshed(self):
+        """test changes made through the me endpoint are seen next time"""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'New name'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New name')
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared-tokens',
+    },
+})
+class SharedTokenCacheTests(TestCase):
+    """test revocations reach processes holding the token locally"""
+
+    def setUp(self):
+        self.shared = patch.object(token_cache, 'shared_alias', 'tokens')
+        self.shared.start()
+        self.addCleanup(self.shared.stop)
+        token_cache.clear()
+        token_cache.shared.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def _change_elsewhere(self, change):
+        """make a change and invalidate the token like another process
+        would, leaving this process's local entry in place
+        """
+        key = token_cache_key(self.token.key)
+        entry = token_cache.local.get(key)
+        self.assertIsNotNone(entry)
+        change()
+        invalidate_tokens([self.token.key])
+        token_cache.local.set(key, entry)
+
+    def test_cached_with_shared_generation(self):
+        """test cached tokens need no database query"""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_deleted_elsewhere_rejected(self):
+        """test a token deleted by another process stops authenticating"""
+        self.client.get(ME_URL)
+
+        self._change_elsewhere(self.token.delete)
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_elsewhere_rejected(self):
+        """test a user deactivated by another process is rejected"""
+        self.client.get(ME_URL)
+
+        self._change_elsewhere(
+            lambda: get_user_model().objects.filter(pk=self.user.pk).update(
+                is_active=False
+            )
+        )
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_event_loop_lookup_needs_local_only_cache(self):
+        """test the event loop never trusts entries it cannot check"""
+        self.client.get(ME_URL)
+        request = RequestFactory().get(
+            ME_URL, HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+
+        self.assertIsNone(cached_token_user(request))
+
+
+class LocalTokenCacheTests(TestCase):
+    """test local entries are short-lived without a shared cache"""
+
+    def test_local_timeout_capped(self):
+        """test other processes notice revocations within seconds"""
+        self.assertLessEqual(
+            token_cache.local.timeout,
+            settings.TOKEN_AUTH_CACHE['LOCAL_TIMEOUT']
+        )
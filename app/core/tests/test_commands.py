@@ -1,8 +1,11 @@
+from io import StringIO
 from unittest.mock import patch
 
 from django.core.management import call_command
 from django.db.utils import OperationalError
-from django.test import TestCase
+from django.test import TestCase, override_settings
+
+from core.models import Recipe
 
 
 class CommandsTestCase(TestCase):
@@ -23,3 +26,24 @@ class CommandsTestCase(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+    def test_benchmark_queries_rolls_back(self):
+        """Test the query benchmark reports plans and leaves no data"""
+        out = StringIO()
+        call_command(
+            'benchmark_queries',
+            users=2, recipes=50, attrs=10, links=2, repeat=1,
+            stdout=out
+        )
+
+        self.assertIn('recipes newest first', out.getvalue())
+        self.assertIn('recipes under 30 minutes', out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=1000)
+    def test_benchmark_login(self):
+        """Test the login benchmark reports throughput per core"""
+        out = StringIO()
+        call_command('benchmark_login', logins=4, threads=2, stdout=out)
+
+        self.assertIn('per core', out.getvalue())
@@ -0,0 +1,181 @@
+import threading
+import time
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.db.pool import ConnectionPool, PoolTimeout, close_pools
+
+
+class FakeConnection:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """test the in-process connection pool"""
+
+    def test_reuses_released_connections(self):
+        """test a released connection is handed out again"""
+        pool = ConnectionPool(max_size=2)
+        conn = pool.acquire(FakeConnection)
+        pool.release(conn)
+
+        self.assertIs(pool.acquire(FakeConnection), conn)
+        self.assertEqual(pool.stats()['size'], 1)
+        self.assertEqual(pool.stats()['acquired'], 2)
+
+    def test_times_out_when_full(self):
+        """test acquire gives up once the pool stays full"""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.acquire(FakeConnection)
+
+        with self.assertLogs('core.db.pool', 'WARNING'):
+            with self.assertRaises(PoolTimeout):
+                pool.acquire(FakeConnection)
+
+        stats = pool.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_waits_for_release(self):
+        """test a waiting acquire gets the connection released meanwhile"""
+        pool = ConnectionPool(max_size=1, timeout=5)
+        conn = pool.acquire(FakeConnection)
+        result = []
+        waiter = threading.Thread(
+            target=lambda: result.append(pool.acquire(FakeConnection))
+        )
+        waiter.start()
+        time.sleep(0.05)
+        pool.release(conn)
+        waiter.join()
+
+        self.assertEqual(result, [conn])
+        self.assertEqual(pool.stats()['waits'], 1)
+        self.assertEqual(pool.stats()['max_in_use'], 1)
+
+    @patch('time.monotonic')
+    def test_expired_connections_closed(self, monotonic):
+        """test connections older than max_age are not reused"""
+        monotonic.return_value = 100
+        pool = ConnectionPool(max_age=10)
+        conn = pool.acquire(FakeConnection)
+        pool.release(conn)
+
+        monotonic.return_value = 111
+        new = pool.acquire(FakeConnection)
+
+        self.assertIsNot(new, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_failing_check_discards(self):
+        """test idle connections failing the check are replaced"""
+        pool = ConnectionPool()
+        conn = pool.acquire(FakeConnection)
+        pool.release(conn)
+
+        new = pool.acquire(FakeConnection, check=lambda conn: False)
+
+        self.assertIsNot(new, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_connect_failure_frees_slot(self):
+        """test a failed connect does not use up the pool"""
+        pool = ConnectionPool(max_size=1)
+
+        def fail():
+            raise OSError('refused')
+
+        with self.assertRaises(OSError):
+            pool.acquire(fail)
+
+        self.assertEqual(pool.stats()['size'], 0)
+        pool.acquire(FakeConnection)
+
+    def test_discard_and_close_idle(self):
+        """test discarded and idle connections are closed"""
+        pool = ConnectionPool()
+        first = pool.acquire(FakeConnection)
+        second = pool.acquire(FakeConnection)
+        pool.discard(first)
+        pool.release(second)
+        pool.close_idle()
+
+        self.assertTrue(first.closed)
+        self.assertTrue(second.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'needs PostgreSQL')
+class PostgresConnectionTests(TestCase):
+    """test health checks and pooling against PostgreSQL"""
+
+    def _wrapper(self, **settings):
+        from core.db.backends.postgresql.base import DatabaseWrapper
+
+        return DatabaseWrapper(
+            dict(connection.settings_dict, **settings), alias='test-pool'
+        )
+
+    def _backend_pid(self, wrapper):
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            return cursor.fetchone()[0]
+
+    def test_persistent_connection_reused(self):
+        """test connections persist across requests"""
+        wrapper = self._wrapper(CONN_MAX_AGE=60, POOL=None)
+        try:
+            pid = self._backend_pid(wrapper)
+            wrapper.close_if_unusable_or_obsolete()
+
+            self.assertEqual(self._backend_pid(wrapper), pid)
+        finally:
+            wrapper.close()
+
+    def test_health_check_replaces_dropped_connection(self):
+        """test a connection dropped by the server is replaced"""
+        wrapper = self._wrapper(
+            CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True, POOL=None
+        )
+        try:
+            pid = self._backend_pid(wrapper)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+            wrapper.close_if_unusable_or_obsolete()
+
+            self.assertNotEqual(self._backend_pid(wrapper), pid)
+        finally:
+            wrapper.close()
+
+    def test_pooled_connection_returned_per_request(self):
+        """test pooled connections go back to the pool between requests"""
+        wrapper = self._wrapper(POOL={
+            'MAX_SIZE': 1, 'TIMEOUT': 0.1, 'MAX_AGE': 600
+        })
+        other = self._wrapper(POOL=wrapper.settings_dict['POOL'])
+        try:
+            pid = self._backend_pid(wrapper)
+            wrapper.close_if_unusable_or_obsolete()
+            self.assertIsNone(wrapper.connection)
+
+            self.assertEqual(self._backend_pid(other), pid)
+            stats = other.pool.stats()
+            self.assertEqual(stats['size'], 1)
+            self.assertEqual(stats['in_use'], 1)
+
+            with self.assertLogs('core.db.pool', 'WARNING'):
+                with self.assertRaises(PoolTimeout):
+                    self._backend_pid(wrapper)
+        finally:
+            other.close()
+            wrapper.close()
+            close_pools()
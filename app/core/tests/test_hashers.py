@@ -0,0 +1,67 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, override_settings
+
+from core import hashers
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class PooledHasherTests(TestCase):
+    """test the configurable, pooled password hasher"""
+
+    def test_iterations_from_settings(self):
+        """test the hash cost comes from settings"""
+        encoded = make_password('testPass123')
+
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(check_password('testPass123', encoded))
+
+    def test_hash_upgraded_when_cost_changes(self):
+        """test a login rehashes passwords stored with another cost"""
+        user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertTrue(user.check_password('testPass123'))
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_hashing_runs_on_pool(self):
+        """test hashing happens on the hashing pool threads"""
+        threads = []
+        encode = hashers.hashers.PBKDF2PasswordHasher.encode
+
+        def record(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return encode(*args, **kwargs)
+
+        with patch.object(
+            hashers.hashers.PBKDF2PasswordHasher, 'encode', record
+        ):
+            make_password('testPass123')
+
+        self.assertTrue(threads[0].startswith('password-hash'))
+
+    def test_check_password_runs_on_pool(self):
+        """test verifying a stored hash happens on the hashing pool"""
+        encoded = make_password('testPass123')
+        threads = []
+        encode = hashers.hashers.PBKDF2PasswordHasher.encode
+
+        def record(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return encode(*args, **kwargs)
+
+        with patch.object(
+            hashers.hashers.PBKDF2PasswordHasher, 'encode', record
+        ):
+            self.assertTrue(check_password('testPass123', encoded))
+
+        self.assertTrue(threads)
+        self.assertTrue(threads[0].startswith('password-hash'))
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+
+
+CONTENT = bytes(range(256)) * 4
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+class MediaViewTests(TestCase):
+    """test serving media files"""
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        media_settings = override_settings(MEDIA_ROOT=self.media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        os.makedirs(os.path.join(self.media_root.name, 'uploads/recipe'))
+        for name in (f'{DIGEST}.jpg', 'variant_large.jpg'):
+            path = os.path.join(self.media_root.name, 'uploads/recipe', name)
+            with open(path, 'wb') as f:
+                f.write(CONTENT)
+        self.url = f'/media/uploads/recipe/{DIGEST}.jpg'
+
+    def tearDown(self):
+        self.media_root.cleanup()
+
+    def test_serve_immutable_file(self):
+        """test content hash names are served with long caching"""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT)
+        self.assertEqual(res['ETag'], f'"{DIGEST}"')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', res['Cache-Control'])
+
+    def test_serve_mutable_file(self):
+        """test other names are revalidated sooner"""
+        res = self.client.get('/media/uploads/recipe/variant_large.jpg')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('immutable', res['Cache-Control'])
+        res.close()
+
+    def test_not_modified(self):
+        """test a matching ETag gets 304"""
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{DIGEST}"')
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_range(self):
+        """test a byte range is served with 206"""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[10:20])
+        self.assertEqual(res['Content-Length'], '10')
+        self.assertEqual(res['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+
+    def test_suffix_range(self):
+        """test the last bytes can be requested"""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[-5:])
+
+    def test_unsatisfiable_range(self):
+        """test a range past the end gets 416"""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_if_range_mismatch(self):
+        """test a stale If-Range gets the whole file"""
+        res = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"other"'
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT)
+
+    def test_missing_and_traversal(self):
+        """test missing files and paths outside MEDIA_ROOT get 404"""
+        self.assertEqual(self.client.get('/media/nope.jpg').status_code, 404)
+        self.assertEqual(
+            self.client.get('/media/../settings.py').status_code, 404
+        )
+        self.assertEqual(self.client.get('/media/uploads').status_code, 404)
+
+    @override_settings(MEDIA_SENDFILE='x-accel-redirect')
+    def test_accel_redirect_offload(self):
+        """test nginx is asked to send the file"""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(
+            res['X-Accel-Redirect'],
+            f'/protected-media/uploads/recipe/{DIGEST}.jpg'
+        )
+        self.assertEqual(res['ETag'], f'"{DIGEST}"')
+
+    @override_settings(MEDIA_SENDFILE='x-sendfile')
+    def test_sendfile_offload(self):
+        """test the proxy is given the full path"""
+        res = self.client.get(self.url)
+
+        self.assertEqual(
+            res['X-Sendfile'],
+            os.path.join(
+                self.media_root.name, 'uploads/recipe', f'{DIGEST}.jpg'
+            )
+        )
@@ -1,6 +1,8 @@
+import hashlib
 from unittest.mock import patch
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from .. import models
 
 
@@ -87,3 +89,13 @@ class ModelTests(TestCase):
         exp_path = f'uploads/recipe/{uuid}.jpg'
 
         self.assertEqual(file_path, exp_path)
+
+    def test_recipe_file_name_content_hash(self):
+        """test that images are named after a hash of their content"""
+        recipe = models.Recipe(
+            image=SimpleUploadedFile('myimage.JPG', b'image content')
+        )
+        file_path = models.recipe_image_file_path(recipe, 'myimage.JPG')
+
+        digest = hashlib.sha256(b'image content').hexdigest()
+        self.assertEqual(file_path, f'uploads/recipe/{digest}.jpg')
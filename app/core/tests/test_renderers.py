@@ -0,0 +1,56 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+from core.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """test the orjson backed renderer"""
+
+    def setUp(self):
+        self.data = {
+            'id': 1,
+            'title': 'Crème brûlée\u2028\u2029',
+            'price': '5.00',
+            'amount': Decimal('1.5'),
+            'created': datetime.datetime(
+                2021, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+            ),
+            'tags': [1, 2],
+            'image_variants': None,
+            2: True,
+        }
+
+    def test_same_bytes_as_json_renderer(self):
+        """test the output matches JSONRenderer byte for byte"""
+        self.assertEqual(
+            FastJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data)
+        )
+
+    def test_indent_falls_back(self):
+        """test indented output is left to JSONRenderer"""
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type)
+        )
+
+    def test_without_orjson(self):
+        """test the renderer works when orjson is not installed"""
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(
+                FastJSONRenderer().render(self.data),
+                JSONRenderer().render(self.data)
+            )
+
+    def test_none_renders_empty(self):
+        """test no data renders as an empty body"""
+        self.assertEqual(FastJSONRenderer().render(None), b'')
@@ -0,0 +1,166 @@
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.test import RequestFactory, SimpleTestCase, \
+    TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.checks import check_replica_pin_cache
+from core.db import routers
+from core.models import Tag
+
+from recipe.cache import response_cache
+
+TAGS_URL = reverse('recipe:tag-list')
+
+
+@contextmanager
+def replica_alias(alias='replica'):
+    """add a database alias reading the test database like a replica"""
+    connections.settings[alias] = dict(
+        connections[DEFAULT_DB_ALIAS].settings_dict
+    )
+    try:
+        yield connections[alias]
+    finally:
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRouterTests(TransactionTestCase):
+    """test reads are routed to replicas"""
+
+    def setUp(self):
+        cache.clear()
+        response_cache.clear()
+        routers._down_until.clear()
+        self.router = routers.ReplicaRouter()
+        alias = replica_alias()
+        self.replica = alias.__enter__()
+        self.addCleanup(alias.__exit__, None, None, None)
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @contextmanager
+    def _request(self, method='GET'):
+        """route queries like during a request of the test user"""
+        request = RequestFactory().generic(method, TAGS_URL)
+        request.user = self.user
+        token = routers.start_request(request)
+        try:
+            yield
+        finally:
+            routers.end_request(token, request)
+
+    def test_reads_outside_requests_use_primary(self):
+        """test reads go to the primary without a routed request"""
+        self.assertEqual(self.router.db_for_read(Tag), DEFAULT_DB_ALIAS)
+
+    def test_safe_request_reads_replica(self):
+        """test safe requests read from the replica until they write"""
+        with self._request():
+            self.assertEqual(self.router.db_for_read(Tag), 'replica')
+            self.assertEqual(self.router.db_for_write(Tag), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(Tag), DEFAULT_DB_ALIAS)
+
+        self.assertTrue(routers.is_pinned(self.user.pk))
+
+    def test_unsafe_request_reads_primary(self):
+        """test reads of unsafe requests go to the primary"""
+        with self._request('POST'):
+            self.assertEqual(self.router.db_for_read(Tag), DEFAULT_DB_ALIAS)
+
+        self.assertFalse(routers.is_pinned(self.user.pk))
+
+    def test_pinned_user_reads_primary(self):
+        """test users who wrote recently read from the primary"""
+        routers.pin(self.user.pk)
+
+        with self._request():
+            self.assertEqual(self.router.db_for_read(Tag), DEFAULT_DB_ALIAS)
+
+    def test_replica_failure_falls_back(self):
+        """test an unavailable replica is skipped for a while"""
+        with patch.object(self.replica, 'ensure_connection',
+                          side_effect=OperationalError('refused')) as ensure:
+            with self.assertLogs('core.db.routers', 'WARNING'):
+                with self._request():
+                    read = self.router.db_for_read(Tag)
+            with self._request():
+                self.assertEqual(self.router.db_for_read(Tag),
+                                 DEFAULT_DB_ALIAS)
+
+        self.assertEqual(read, DEFAULT_DB_ALIAS)
+        self.assertEqual(ensure.call_count, 1)
+
+    def test_no_migrations_on_replicas(self):
+        """test replicas are never migrated"""
+        self.assertFalse(self.router.allow_migrate('replica', 'core'))
+        self.assertIsNone(
+            self.router.allow_migrate(DEFAULT_DB_ALIAS, 'core')
+        )
+
+    def test_api_reads_your_writes(self):
+        """test the API reads from the replica, then the primary once
+        the user wrote
+        """
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        with CaptureQueriesContext(self.replica) as replica_queries:
+            with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as \
+                    primary_queries:
+                res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertTrue(replica_queries)
+        self.assertFalse(primary_queries)
+
+        res = self.client.post(TAGS_URL, {'name': 'Dessert'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(self.replica) as replica_queries:
+            res = self.client.get(TAGS_URL)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertFalse(replica_queries)
+
+
+class ReplicaPinCacheCheckTests(SimpleTestCase):
+    """test the check of where read-your-writes pins are kept"""
+
+    @override_settings(REPLICA_DATABASES=['replica'])
+    def test_per_process_pin_cache_warns(self):
+        """test pins in a per-process cache are reported"""
+        warnings = check_replica_pin_cache(None)
+
+        self.assertEqual([w.id for w in warnings], ['core.W001'])
+
+    @override_settings(REPLICA_DATABASES=['replica'], CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.memcached.'
+                       'PyMemcacheCache',
+            'LOCATION': 'cache:11211',
+        },
+    }, REPLICA_PIN_CACHE='shared')
+    def test_shared_pin_cache_passes(self):
+        """test pins in a cache all processes reach are accepted"""
+        self.assertEqual(check_replica_pin_cache(None), [])
+
+    def test_no_replicas_pass(self):
+        """test nothing is reported without replicas"""
+        self.assertEqual(check_replica_pin_cache(None), [])
@@ -0,0 +1,157 @@
+import importlib
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.signals import request_finished
+from django.test import SimpleTestCase, override_settings
+
+from core.serving import MemoryRecycler, server_options, worker_count
+
+MB = 1024 * 1024
+
+
+class ServingTests(SimpleTestCase):
+    """test the production server configuration"""
+
+    def test_worker_count(self):
+        """test workers are sized from the cores"""
+        self.assertEqual(worker_count(cores=4), 9)
+        self.assertEqual(worker_count(asgi=True, cores=4), 4)
+
+    def test_server_options(self):
+        """test the gunicorn settings follow the SERVER setting"""
+        server = dict(settings.SERVER, WORKERS=0, ASGI=False)
+        options = server_options(server, cores=2)
+
+        self.assertEqual(options['workers'], 5)
+        self.assertEqual(options['worker_class'], 'gthread')
+        self.assertEqual(options['keepalive'], server['KEEPALIVE'])
+        self.assertEqual(options['max_requests'], server['MAX_REQUESTS'])
+
+        options = server_options(dict(server, ASGI=True, WORKERS=3))
+        self.assertEqual(options['workers'], 3)
+        self.assertEqual(options['worker_class'],
+                         'uvicorn.workers.UvicornWorker')
+        self.assertNotIn('threads', options)
+
+    @patch('os.kill')
+    def test_memory_recycler(self, kill):
+        """test the worker is stopped once, after growing too much"""
+        sizes = iter([100 * MB, 150 * MB, 250 * MB, 300 * MB])
+        recycler = MemoryRecycler(100 * MB, measure=lambda: next(sizes))
+
+        recycler()
+        kill.assert_not_called()
+
+        with self.assertLogs('core.serving', 'WARNING'):
+            recycler()
+        kill.assert_called_once_with(os.getpid(), signal.SIGTERM)
+
+        recycler()
+        self.assertEqual(kill.call_count, 1)
+
+    def test_gunicorn_conf(self):
+        """test the gunicorn configuration connects the recycler"""
+        from app import gunicorn_conf
+        gunicorn_conf = importlib.reload(gunicorn_conf)
+
+        self.assertEqual(gunicorn_conf.bind, settings.SERVER['BIND'])
+        receivers = len(request_finished.receivers)
+        gunicorn_conf.post_worker_init(None)
+        try:
+            self.assertEqual(len(request_finished.receivers), receivers + 1)
+        finally:
+            request_finished.receivers.pop()
+
+    def test_gunicorn_conf_enables_async_views(self):
+        """test ASGI workers get async views although the master loads
+        the settings before app.asgi
+        """
+        env = dict(os.environ, SERVER_ASGI='1')
+        env.pop('ASYNC_API_VIEWS', None)
+        out = subprocess.run(
+            [sys.executable, '-c',
+             'import app.gunicorn_conf, app.asgi\n'
+             'from django.conf import settings\n'
+             'print(settings.ASYNC_API_VIEWS)'],
+            cwd=settings.BASE_DIR, env=env, capture_output=True,
+            text=True, check=True
+        ).stdout
+
+        self.assertEqual(out.strip(), 'True')
+
+    @patch('os.execvp')
+    @patch('shutil.which', return_value='/usr/bin/gunicorn')
+    def test_serve_asgi_enables_async_views(self, which, execvp):
+        """test serve --asgi turns on async views for the workers"""
+        with patch.dict(os.environ):
+            call_command('serve', asgi=True, stdout=StringIO(),
+                         stderr=StringIO())
+            self.assertEqual(os.environ['SERVER_ASGI'], '1')
+            self.assertEqual(os.environ['ASYNC_API_VIEWS'], '1')
+
+        execvp.assert_called_once()
+        self.assertIn('app.asgi:application', execvp.call_args[0][1])
+
+    @override_settings(DEBUG=True, RESPONSE_CACHE=dict(
+        settings.RESPONSE_CACHE, BACKEND='local'
+    ))
+    def test_serve_dry_run(self):
+        """test the command prints the server and warns about settings"""
+        out = StringIO()
+        err = StringIO()
+        with override_settings(SERVER=dict(settings.SERVER, WORKERS=2)):
+            call_command('serve', asgi=True, dry_run=True,
+                         stdout=out, stderr=err)
+
+        self.assertIn('app.asgi:application', out.getvalue())
+        self.assertIn('workers: 2', out.getvalue())
+        self.assertIn('DEBUG', err.getvalue())
+        self.assertIn('RESPONSE_CACHE', err.getvalue())
+
+    @override_settings(
+        RESPONSE_CACHE=dict(settings.RESPONSE_CACHE, BACKEND='local',
+                            SHARED_CACHE='shared'),
+        CACHES=dict(settings.CACHES, shared={
+            'BACKEND': 'django.core.cache.backends.memcached.'
+                       'PyMemcacheCache',
+            'LOCATION': 'cache:11211',
+        })
+    )
+    def test_serve_local_responses_shared_versions(self):
+        """test local responses are fine once versions are shared"""
+        err = StringIO()
+        with override_settings(SERVER=dict(settings.SERVER, WORKERS=2)):
+            call_command('serve', dry_run=True, stdout=StringIO(),
+                         stderr=err)
+
+        self.assertNotIn('RESPONSE_CACHE', err.getvalue())
+
+    @patch('os.kill')
+    def test_serve_reload(self, kill):
+        """test reload sends SIGHUP to the server in the pidfile"""
+        with tempfile.NamedTemporaryFile('w') as pidfile:
+            pidfile.write('4242\n')
+            pidfile.flush()
+            with override_settings(
+                SERVER=dict(settings.SERVER, PIDFILE=pidfile.name)
+            ):
+                call_command('serve', reload=True, stdout=StringIO())
+
+        kill.assert_called_once_with(4242, signal.SIGHUP)
+
+    def test_serve_reload_not_running(self):
+        """test reloading without a running server fails"""
+        with override_settings(
+            SERVER=dict(settings.SERVER, PIDFILE='/nonexistent/server.pid')
+        ):
+            with self.assertRaises(CommandError):
+                call_command('serve', reload=True)
@@ -0,0 +1,41 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from core.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    """test saving content addressed files"""
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        self.storage = ContentAddressedStorage(location=self.root.name)
+
+    def test_existing_name_reused(self):
+        """test saving an existing name keeps the stored file"""
+        name = self.storage.save('images/abc.png', ContentFile(b'first'))
+        os.utime(self.storage.path(name), (0, 0))
+
+        again = self.storage.save('images/abc.png', ContentFile(b'second'))
+
+        self.assertEqual(again, name)
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b'first')
+        self.assertGreater(os.path.getmtime(self.storage.path(name)), 0)
+        self.assertEqual(os.listdir(self.storage.path('images')), ['abc.png'])
+
+    def test_file_created_after_exists_check(self):
+        """test a file stored concurrently after the check is reused"""
+        self.storage.save('images/abc.png', ContentFile(b'first'))
+
+        with patch.object(self.storage, 'exists', return_value=False):
+            name = self.storage.save('images/abc.png', ContentFile(b'second'))
+
+        self.assertEqual(name, 'images/abc.png')
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b'first')
@@ -0,0 +1,190 @@
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+
+# files named after the SHA-256 of their content never change
+CONTENT_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class RangeFile:
+    """file wrapper that reads at most length bytes from start"""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        """read up to size bytes without passing the end of the range"""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+
+        return data
+
+    def close(self):
+        """close the wrapped file"""
+        self.file.close()
+
+
+def _etag(path, st):
+    """return a strong ETag, the content hash when the name carries one"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if CONTENT_HASH_RE.match(stem):
+        return f'"{stem}"', True
+
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"', False
+
+
+def _not_modified(request, etag, mtime):
+    """return whether the client copy is still current"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+
+    if_modified_since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE')
+    )
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def _byte_range(request, etag, mtime, size):
+    """return the (start, length) requested, None for the whole file
+
+    Only single ranges are served, anything else gets the full file.
+    Raises ValueError for an unsatisfiable range.
+    """
+    header = request.META.get('HTTP_RANGE', '')
+    match = RANGE_RE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag \
+            and parse_http_date_safe(if_range) != int(mtime):
+        return None
+
+    first, last = match.groups()
+    if first == '':
+        length = min(int(last), size)
+        start = size - length
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        length = end - start + 1
+
+    if start >= size or length <= 0:
+        raise ValueError(header)
+
+    return start, length
+
+
+def _set_headers(response, st, etag, immutable):
+    """add validators and caching headers"""
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(st.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    if immutable:
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.MEDIA_MAX_AGE
+        )
+
+
+def _offload(path, relative_path, content_type):
+    """return a response telling the front proxy to send the file"""
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = os.path.join(
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX, relative_path
+        )
+    else:
+        response['X-Sendfile'] = path
+
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """serve a file from MEDIA_ROOT
+
+    With MEDIA_SENDFILE set the front proxy sends the bytes, including
+    ranges. Otherwise the file object is handed to the WSGI server,
+    which sends it with sendfile where it supports it.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        st = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('File not found')
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('File not found')
+
+    etag, immutable = _etag(full_path, st)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    if _not_modified(request, etag, st.st_mtime):
+        response = HttpResponse(status=304)
+    elif settings.MEDIA_SENDFILE:
+        response = _offload(full_path, path, content_type)
+    else:
+        response = _file_response(request, full_path, st, etag,
+                                  content_type)
+        if response.status_code == 416:
+            return response
+
+    _set_headers(response, st, etag, immutable)
+    if encoding:
+        response['Content-Encoding'] = encoding
+
+    return response
+
+
+def _file_response(request, full_path, st, etag, content_type):
+    """stream the file, or the requested byte range of it"""
+    try:
+        byte_range = _byte_range(request, etag, st.st_mtime, st.st_size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{st.st_size}'
+        return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type)
+
+    start, length = byte_range
+    if request.META.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+        # gunicorn bounds sendfile by Content-Length, so the positioned
+        # file can still be sent without copying
+        file.seek(start)
+        response = FileResponse(file, content_type=content_type)
+    else:
+        response = FileResponse(
+            RangeFile(file, start, length), content_type=content_type
+        )
+
+    response.status_code = 206
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = \
+        f'bytes {start}-{start + length - 1}/{st.st_size}'
+
+    return response
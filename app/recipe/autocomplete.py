@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from core.cache import LRUCache
+
+# shorter text has too few trigrams to judge similarity
+MIN_FUZZY_LENGTH = 3
+
+# result sets kept per scope before the oldest are dropped
+MAX_RESULTS_PER_SCOPE = 256
+
+
+def is_fuzzy(using='default'):
+    """return whether a database can match similar names with pg_trgm"""
+    return connections[using].vendor == 'postgresql'
+
+
+def _flag(condition):
+    return Case(
+        When(condition, then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField()
+    )
+
+
+def match(queryset, text, limit):
+    """return up to limit objects whose name matches text
+
+    Names starting with text come first, then names containing it. On
+    PostgreSQL names similar to text fill the rest, best first; both
+    lookups are served by the trigram indexes on name.
+    """
+    matches = Q(name__icontains=text)
+    queryset = queryset.annotate(
+        prefix=_flag(Q(name__istartswith=text)),
+        contains=_flag(Q(name__icontains=text))
+    )
+    ordering = ['-prefix', '-contains']
+
+    if is_fuzzy(queryset.db) and len(text) >= MIN_FUZZY_LENGTH:
+        matches |= Q(name__trigram_similar=text)
+        queryset = queryset.annotate(
+            similarity=TrigramSimilarity('name', text)
+        )
+        ordering.append('-similarity')
+
+    return queryset.filter(matches).order_by(*ordering, 'name', 'id')[:limit]
+
+
+class AutocompleteCache:
+    """per-user in-memory autocomplete results
+
+    Results are grouped by scope (the viewset, user and filters) and
+    dropped when the user's collection version changes. Where matching
+    is by substring only, the results for text can be narrowed from
+    those of any shorter prefix that were not cut off by the limit, so
+    most keystrokes after the first never reach the database.
+    """
+
+    def __init__(self, max_entries=1000, timeout=300):
+        self._scopes = LRUCache(max_entries=max_entries, timeout=timeout)
+
+    def get(self, scope, version, text, limit, narrow=False):
+        """return the cached rows for text, or None"""
+        entry = self._scopes.get(scope)
+        if entry is None or entry[0] != version:
+            return None
+
+        results = entry[1]
+        if text in results:
+            return results[text]
+
+        if narrow:
+            for length in range(len(text) - 1, 0, -1):
+                rows = results.get(text[:length])
+                if rows is not None and len(rows) < limit:
+                    rows = self._narrow(rows, text)
+                    results[text] = rows
+                    return rows
+
+        return None
+
+    def _narrow(self, rows, text):
+        """filter and reorder rows of a shorter prefix to match text"""
+        rows = [row for row in rows if text in row['name'].lower()]
+        rows.sort(key=lambda row: (
+            not row['name'].lower().startswith(text), row['name'], row['id']
+        ))
+
+        return rows
+
+    def set(self, scope, version, text, rows):
+        """store the rows for text under the current version"""
+        entry = self._scopes.get(scope)
+        if entry is None or entry[0] != version \
+                or len(entry[1]) >= MAX_RESULTS_PER_SCOPE:
+            entry = (version, {})
+            self._scopes.set(scope, entry)
+
+        entry[1][text] = rows
+
+    def clear(self):
+        """drop every cached result"""
+        self._scopes.clear()
+
+
+autocomplete_cache = AutocompleteCache(
+    max_entries=settings.RECIPE_AUTOCOMPLETE_CACHE_ENTRIES,
+    timeout=settings.RESPONSE_CACHE['TIMEOUT']
+)
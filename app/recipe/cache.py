@@ -0,0 +1,166 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from core.cache import LRUCache
+
+
+def plain_data(data):
+    """return a copy of serializer data made of plain dicts and lists"""
+    if isinstance(data, dict):
+        return {key: plain_data(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [plain_data(item) for item in data]
+
+    return data
+
+
+class ResponseCache:
+    """per-user collection versions and cache of API response data
+
+    Every entry is keyed on the user's collection version, which is
+    bumped whenever one of their tags, ingredients or recipes changes,
+    so stale entries are never read and simply age out. The version is
+    also the time of the last change and drives conditional requests;
+    every change moves it to a later second, so Last-Modified changes
+    too.
+    Versions always live in the shared cache, so a change made by one
+    process invalidates what every other process cached; the backend
+    only decides where the response data is kept.
+    """
+
+    def __init__(self, backend='local', shared=None, max_entries=1024,
+                 timeout=300):
+        self.backend = backend
+        self.shared = shared
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = LRUCache(max_entries=max_entries, timeout=timeout)
+
+    @property
+    def enabled(self):
+        """return whether responses are cached at all"""
+        return self.backend != 'none'
+
+    @property
+    def versions(self):
+        """return the cache holding the collection versions"""
+        return caches[self.shared]
+
+    @property
+    def is_local(self):
+        """return whether versions and responses live in this process,
+        so reading them never blocks
+
+        Only true for the local backend when the shared cache is a
+        LocMemCache, that is with a single process.
+        """
+        return self.backend == 'local' \
+            and isinstance(self.versions, LocMemCache)
+
+    @property
+    def store(self):
+        """return the cache holding responses"""
+        if self.backend in ('shared', 'none'):
+            return caches[self.shared]
+
+        return self._local
+
+    def _version_key(self, user_id):
+        return f'recipe-version:{user_id}'
+
+    def version(self, user_id):
+        """return the current collection version of a user"""
+        version = self.versions.get(self._version_key(user_id))
+        if version is None:
+            # unknown or evicted, start a new version so nothing cached
+            # under an earlier one can be served
+            version = self._new_version(user_id)
+
+        return version
+
+    def _new_version(self, user_id, changed=False):
+        now = time.time()
+        previous = self.versions.get(self._version_key(user_id))
+        if previous is not None:
+            previous = float(previous)
+            if changed and int(previous) >= int(now):
+                # Last-Modified has whole seconds, a change within the
+                # second of the previous version must still move it
+                now = int(previous) + 1
+            elif previous >= now:
+                # never go back to a version responses were cached under
+                now = previous + 0.000001
+        version = f'{now:.6f}'
+        # versions must outlive the responses cached under them
+        self.versions.set(
+            self._version_key(user_id), version, self.timeout * 2
+        )
+
+        return version
+
+    def bump(self, user_id):
+        """invalidate everything cached for a user
+
+        Bumps right away and again once the surrounding transaction
+        commits, so a concurrent read of the old rows cannot be cached
+        under the new version. Only the version made on commit marks
+        the change and must fall in a later second.
+        """
+        self._new_version(user_id)
+        transaction.on_commit(
+            lambda: self._new_version(user_id, changed=True)
+        )
+
+    def key(self, user_id, version, *parts):
+        """return the cache key of a response for a collection version"""
+        digest = hashlib.sha1(
+            '\n'.join(str(part) for part in parts).encode()
+        ).hexdigest()
+
+        return f'recipe-response:{user_id}:{version}:{digest}'
+
+    def get(self, key):
+        """return cached response data or None, counting hits and misses"""
+        data = self.store.get(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return data
+
+    def set(self, key, data):
+        """cache a plain copy of response data
+
+        Serializer data keeps a reference to its serializer, and with it
+        the request and the view, which must not outlive the request.
+        """
+        self.store.set(key, plain_data(data), self.timeout)
+
+    def stats(self):
+        """return hit and miss counts for this process"""
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        """drop local entries and reset the statistics"""
+        self._local.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+response_cache = ResponseCache(
+    backend=settings.RESPONSE_CACHE['BACKEND'],
+    shared=settings.RESPONSE_CACHE['SHARED_CACHE'],
+    max_entries=settings.RESPONSE_CACHE['MAX_ENTRIES'],
+    timeout=settings.RESPONSE_CACHE['TIMEOUT'],
+)
@@ -0,0 +1,183 @@
+import decimal
+import functools
+
+from django.db import models
+
+from rest_framework import fields, relations, serializers
+from rest_framework.settings import api_settings
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from .fields import ImageVariantsField, variant_urls
+
+# fields whose representation of a database value is a plain conversion
+CONVERSIONS = {
+    fields.IntegerField: int,
+    fields.CharField: str,
+    fields.EmailField: str,
+    fields.SlugField: str,
+    fields.URLField: str,
+    fields.BooleanField: bool,
+    fields.FloatField: float,
+}
+
+
+def _decimal(field):
+    """return a converter quantizing like DecimalField.to_representation"""
+    if field.decimal_places is None or field.localize \
+            or not getattr(field, 'coerce_to_string',
+                           api_settings.COERCE_DECIMAL_TO_STRING):
+        return None
+
+    places = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return '{:f}'.format(
+            value.quantize(places, rounding=field.rounding, context=context)
+        )
+
+    return convert
+
+
+def _image_variants(field, model):
+    """return a converter for an image file or, in value rows, its name"""
+    storage = model._meta.get_field(field.source_attrs[0]).storage
+
+    def convert(value, context):
+        if not value:
+            return None
+        if isinstance(value, str):
+            return variant_urls(value, storage, context.get('request'))
+        return variant_urls(value.name, value.storage, context.get('request'))
+
+    return convert
+
+
+def _many(represent):
+    """apply represent to every object of a manager, queryset or list"""
+    def convert(value):
+        if isinstance(value, models.Manager):
+            value = value.all()
+        return [represent(item) for item in value]
+
+    return convert
+
+
+def _pk(value):
+    """return the pk of a related object, or the pk itself in value rows"""
+    return getattr(value, 'pk', value)
+
+
+class CompiledSerializer:
+    """the readable fields of a serializer class, resolved once
+
+    Field types with a known representation are converted directly,
+    nested serializers are compiled in turn, and anything else falls back
+    to the field of a serializer bound for the request. Produces the same
+    output as the serializer for model instances, and for values() rows
+    carrying lists of related ids under the relation names.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+        self.steps = []
+        for field in serializer_class().fields.values():
+            if field.write_only:
+                continue
+            self.steps.append(
+                (field.field_name, field.source_attrs,
+                 self._compile(field, model))
+            )
+
+    def _compile(self, field, model):
+        """return how to convert a field: a function of the value, a
+        (kind, argument) pair resolved on bind, or None to fall back
+        """
+        if isinstance(field, serializers.ListSerializer):
+            return ('many', compile_serializer(type(field.child)))
+        if isinstance(field, serializers.BaseSerializer):
+            return ('one', compile_serializer(type(field)))
+        if isinstance(field, relations.ManyRelatedField) \
+                and self._is_plain_pk(field.child_relation):
+            return _many(_pk)
+        if isinstance(field, ImageVariantsField) and model is not None:
+            return ('context', _image_variants(field, model))
+        if isinstance(field, fields.DecimalField):
+            return _decimal(field)
+
+        return CONVERSIONS.get(type(field))
+
+    def _is_plain_pk(self, field):
+        """return whether a related field represents objects by pk"""
+        return isinstance(field, relations.PrimaryKeyRelatedField) \
+            and field.pk_field is None \
+            and type(field).to_representation is \
+            relations.PrimaryKeyRelatedField.to_representation
+
+    def bind(self, context):
+        """return a function representing one instance for a request"""
+        bound_fields = None
+        steps = []
+        for name, source_attrs, convert in self.steps:
+            if isinstance(convert, tuple):
+                kind, argument = convert
+                if kind == 'context':
+                    convert = functools.partial(argument, context=context)
+                elif kind == 'many':
+                    convert = _many(argument.bind(context))
+                else:
+                    convert = argument.bind(context)
+            elif convert is None:
+                if bound_fields is None:
+                    bound_fields = self.serializer_class(
+                        context=context
+                    ).fields
+                convert = bound_fields[name].to_representation
+            steps.append((name, source_attrs, convert))
+
+        def represent(instance):
+            ret = {}
+            for name, source_attrs, convert in steps:
+                value = fields.get_attribute(instance, source_attrs)
+                ret[name] = None if value is None else convert(value)
+            return ret
+
+        return represent
+
+
+@functools.lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    """return the compiled form of a serializer class, built once"""
+    return CompiledSerializer(serializer_class)
+
+
+class ReadSerializer:
+    """read only stand-in for a serializer built from its compiled form"""
+
+    def __init__(self, serializer_class, instance, many=False, context=None):
+        self.serializer_class = serializer_class
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @property
+    def data(self):
+        """return the representation, as serializer.data would"""
+        represent = compile_serializer(self.serializer_class).bind(
+            self.context
+        )
+        if self.many:
+            instances = self.instance
+            if isinstance(instances, models.Manager):
+                instances = instances.all()
+            return ReturnList(
+                [represent(instance) for instance in instances],
+                serializer=self
+            )
+
+        return ReturnDict(represent(self.instance), serializer=self)
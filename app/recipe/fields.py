@@ -0,0 +1,113 @@
+import re
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from .images import variant_names
+
+
+PK_RE = re.compile(r'[0-9]+')
+
+
+def to_pk(value):
+    """return a submitted id as an integer primary key
+
+    Accepts integers, whole numbers and strings of digits. Raises
+    TypeError for booleans and other types, ValueError for fractions
+    and any other string, where int() would truncate or strip them.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise TypeError(f'{type(value).__name__} is not a pk')
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f'{value} is not a whole number')
+    if isinstance(value, str) and not PK_RE.fullmatch(value):
+        raise ValueError(f'{value!r} is not a number')
+
+    return int(value)
+
+
+def variant_urls(name, storage, request=None):
+    """return a variant name to URL mapping for an image name"""
+    urls = {}
+    for variant, variant_name in variant_names(name).items():
+        url = storage.url(variant_name)
+        urls[variant] = request.build_absolute_uri(url) \
+            if request is not None else url
+
+    return urls
+
+
+class UserManyRelatedField(serializers.ManyRelatedField):
+    """many related field resolving every submitted pk in one query"""
+
+    def to_internal_value(self, data):
+        """look up all pks at once and report every invalid one"""
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        pk_field = child.get_queryset().model._meta.pk
+        pks = []
+        errors = []
+        for item in data:
+            try:
+                pks.append(pk_field.to_python(to_pk(item)))
+            except (TypeError, ValueError, DjangoValidationError):
+                errors.append(child.error_messages['incorrect_type'].format(
+                    data_type=type(item).__name__
+                ))
+
+        found = child.get_queryset().in_bulk(pks)
+        errors.extend(
+            child.error_messages['does_not_exist'].format(pk_value=pk)
+            for pk in pks if pk not in found
+        )
+        if errors:
+            raise ValidationError(errors)
+
+        return [found[pk] for pk in pks]
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """primary key field limited to objects of the requesting user"""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        """use the batched field for many=True"""
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+
+        return UserManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        """return only the objects owned by the requesting user"""
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None:
+            return queryset.none()
+
+        return queryset.filter(user=request.user)
+
+
+class ImageVariantsField(serializers.Field):
+    """read only URLs of the resized variants of an image"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        """return a variant name to URL mapping, or None without image"""
+        if not value:
+            return None
+
+        return variant_urls(
+            value.name, value.storage, self.context.get('request')
+        )
@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from io import BytesIO
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from core.models import Recipe
+
+
+logger = logging.getLogger(__name__)
+
+IMAGES_DIR = 'uploads/recipe/'
+VARIANTS_DIR = 'uploads/recipe/variants/'
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+def variant_name(name, variant):
+    """return the storage name of a resized variant of an image"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+
+    return os.path.join(VARIANTS_DIR, f'{stem}_{variant}.jpg')
+
+
+def variant_names(name):
+    """return the storage names of every variant of an image"""
+    return {
+        variant: variant_name(name, variant)
+        for variant in settings.RECIPE_IMAGE_VARIANTS
+    }
+
+
+def image_storage():
+    """return the storage recipe images and their variants live in"""
+    return Recipe._meta.get_field('image').storage
+
+
+def process_image(name):
+    """write resized, recompressed JPEG variants of a stored image"""
+    storage = image_storage()
+    if all(storage.exists(target) for target in variant_names(name).values()):
+        # identical content was uploaded and processed before
+        return
+
+    with storage.open(name) as f:
+        original = Image.open(f)
+        original.load()
+
+    if original.mode not in ('RGB', 'L'):
+        original = original.convert('RGB')
+
+    for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        image = original.copy()
+        image.thumbnail(size, Image.LANCZOS)
+        buf = BytesIO()
+        image.save(
+            buf,
+            format='JPEG',
+            quality=settings.RECIPE_IMAGE_QUALITY,
+            optimize=True,
+            progressive=True
+        )
+
+        # a variant stored meanwhile by a concurrent run is kept
+        storage.save(variant_name(name, variant), ContentFile(buf.getvalue()))
+
+
+def is_recent(name):
+    """return whether a stored image is inside the cleanup grace period"""
+    age = time.time() - os.path.getmtime(image_storage().path(name))
+
+    return age < settings.RECIPE_IMAGE_GRACE_SECONDS
+
+
+def delete_image(name):
+    """delete a stored image and all of its variants"""
+    storage = image_storage()
+    storage.delete(name)
+    for target in variant_names(name).values():
+        storage.delete(target)
+
+
+def release(name):
+    """drop a reference to an image, deleting it when none are left
+
+    Images stored or reused within the grace period are kept, since a
+    concurrent upload of the same content may not be committed yet.
+    The cleanup_recipe_images command collects those later.
+    """
+    storage = image_storage()
+    if not name or not storage.exists(name):
+        return
+
+    if Recipe.objects.filter(image=name).exists() or is_recent(name):
+        return
+
+    delete_image(name)
+
+
+def _process_logged(name):
+    try:
+        process_image(name)
+    except Exception:
+        logger.exception('Processing recipe image %s failed', name)
+        raise
+
+
+def get_executor():
+    """return the thread pool images are processed on"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-image'
+            )
+
+    return _executor
+
+
+def enqueue(name):
+    """process an image in the background, return the future"""
+    future = get_executor().submit(_process_logged, name)
+    _pending.add(future)
+    future.add_done_callback(_pending.discard)
+
+    return future
+
+
+def wait(timeout=None):
+    """block until every queued image has been processed"""
+    wait_futures(list(_pending), timeout=timeout)
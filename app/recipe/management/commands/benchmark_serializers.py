@@ -0,0 +1,113 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Tag, Ingredient, Recipe
+from core.renderers import FastJSONRenderer, orjson
+
+from recipe.serializers import RecipeRowSerializer, RecipeSerializer
+
+
+class Command(BaseCommand):
+    """Django command to compare recipe list serialization costs"""
+
+    help = 'Time recipe list serialization and rendering per row, roll back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--attrs', type=int, default=50,
+                            help='tags and ingredients')
+        parser.add_argument('--links', type=int, default=3,
+                            help='tags and ingredients per recipe')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        with transaction.atomic():
+            user = self._seed(options)
+            self._report(user, options)
+            # never leave the benchmark rows behind
+            transaction.set_rollback(True)
+
+    def _seed(self, options):
+        """create a user with linked recipes, tags and ingredients"""
+        rnd = random.Random(0)
+        user = get_user_model().objects.create(
+            email='serializers@benchmark.local'
+        )
+        related = {}
+        for field, model in (('tags', Tag), ('ingredients', Ingredient)):
+            model.objects.bulk_create(
+                [model(user=user, name=f'{model.__name__} {i:05d}')
+                 for i in range(options['attrs'])]
+            )
+            related[field] = list(model.objects.filter(user=user))
+        for i in range(options['recipes']):
+            recipe = Recipe.objects.create(
+                user=user,
+                title=f'Recipe {i}',
+                time_minutes=rnd.randint(1, 240),
+                price=rnd.randint(100, 99999) / 100
+            )
+            for field, objs in related.items():
+                getattr(recipe, field).set(
+                    rnd.sample(objs, min(options['links'], len(objs)))
+                )
+
+        return user
+
+    def _time(self, func, repeat):
+        """return the median run time of func in seconds and its result"""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+
+        return statistics.median(timings), result
+
+    def _report(self, user, options):
+        """print the per row cost of each serializer and renderer"""
+        recipes = Recipe.objects.filter(user=user).order_by('-id')
+        rows = options['recipes']
+
+        def model_serializer():
+            queryset = recipes.prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.only('id')),
+                Prefetch('ingredients', queryset=Ingredient.objects.only('id'))
+            )
+            return RecipeSerializer(queryset, many=True).data
+
+        def row_serializer():
+            return RecipeRowSerializer(
+                recipes.values(*RecipeRowSerializer.columns)
+            ).data
+
+        results = {}
+        for name, func in (('RecipeSerializer', model_serializer),
+                           ('RecipeRowSerializer', row_serializer)):
+            seconds, results[name] = self._time(func, options['repeat'])
+            self.stdout.write(
+                f'{name}: {seconds / rows * 1e6:.1f} us per row '
+                f'(query and serialize)'
+            )
+
+        data = results['RecipeRowSerializer']
+        if orjson is None:
+            self.stdout.write('orjson is not installed, FastJSONRenderer '
+                              'falls back to JSONRenderer')
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            seconds, _ = self._time(
+                lambda: renderer.render(data), options['repeat']
+            )
+            self.stdout.write(
+                f'{type(renderer).__name__}: '
+                f'{seconds / rows * 1e6:.1f} us per row (render)'
+            )
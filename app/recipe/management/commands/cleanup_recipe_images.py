@@ -0,0 +1,85 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe import images
+
+
+class Command(BaseCommand):
+    """Django command to delete recipe images no recipe references"""
+
+    help = 'Delete orphaned recipe images and variants in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='only list the files that would be deleted')
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        storage = images.image_storage()
+        if not storage.exists(images.IMAGES_DIR):
+            self.stdout.write('No recipe images stored')
+            return
+
+        _, files = storage.listdir(images.IMAGES_DIR)
+        # temporary files of saves in progress start with a dot
+        names = [os.path.join(images.IMAGES_DIR, f) for f in files
+                 if not f.startswith('.')]
+        batch_size = options['batch_size']
+        deleted = 0
+        kept = set()
+
+        for start in range(0, len(names), batch_size):
+            batch = names[start:start + batch_size]
+            referenced = set(Recipe.objects.filter(
+                image__in=batch
+            ).values_list('image', flat=True))
+
+            for name in batch:
+                if name in referenced or images.is_recent(name):
+                    kept.add(name)
+                    continue
+
+                deleted += 1
+                self._delete(name, options['dry_run'], images.delete_image)
+
+        deleted += self._cleanup_variants(storage, kept, options['dry_run'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Would delete" if options["dry_run"] else "Deleted"} '
+            f'{deleted} files, kept {len(kept)} images'
+        ))
+
+    def _cleanup_variants(self, storage, kept, dry_run):
+        """delete variants whose original image is gone
+
+        Variants inside the grace period are kept like originals, as they
+        may belong to an image uploaded after the originals were listed.
+        """
+        if not storage.exists(images.VARIANTS_DIR):
+            return 0
+
+        live = {
+            os.path.basename(name) for original in kept
+            for name in images.variant_names(original).values()
+        }
+        _, files = storage.listdir(images.VARIANTS_DIR)
+        deleted = 0
+        for variant in files:
+            name = os.path.join(images.VARIANTS_DIR, variant)
+            if variant in live or variant.startswith('.') \
+                    or images.is_recent(name):
+                continue
+
+            deleted += 1
+            self._delete(name, dry_run, storage.delete)
+
+        return deleted
+
+    def _delete(self, name, dry_run, delete):
+        """delete a file unless this is a dry run"""
+        self.stdout.write(name)
+        if not dry_run:
+            delete(name)
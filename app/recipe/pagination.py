@@ -0,0 +1,40 @@
+from django.conf import settings
+
+from rest_framework.pagination import CursorPagination, \
+                                      PageNumberPagination
+
+
+class BaseCursorPagination(CursorPagination):
+    """keyset pagination with a client controlled, capped page size"""
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        """read the cap from settings so it can be tuned per environment"""
+        return settings.API_MAX_PAGE_SIZE
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    """paginate recipes newest first, or in the order the view asks for"""
+    ordering = '-id'
+
+    def get_ordering(self, request, queryset, view):
+        """use the validated ordering parameter of the view"""
+        if hasattr(view, 'get_ordering'):
+            return view.get_ordering()
+
+        return super().get_ordering(request, queryset, view)
+
+
+class NameCursorPagination(BaseCursorPagination):
+    """paginate tags and ingredients by name, ties broken by id"""
+    ordering = ('-name', '-id')
+
+
+class RecipeSearchPagination(PageNumberPagination):
+    """paginate ranked search results, which have no stable keyset"""
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
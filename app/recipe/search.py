@@ -0,0 +1,163 @@
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, \
+                                           SearchVector
+from django.db import connections
+from django.db.models import Case, F, FloatField, OuterRef, Subquery, \
+                             Value, When
+
+from core.cache import LRUCache
+from core.models import Recipe
+
+from .cache import response_cache
+
+# weights of the title and the related names, as ts_rank weighs A and B
+TITLE_WEIGHT = 1.0
+RELATED_WEIGHT = 0.4
+
+TOKEN_RE = re.compile(r'\w+')
+
+_indexes = LRUCache(
+    max_entries=settings.RECIPE_SEARCH_INDEX_ENTRIES,
+    timeout=settings.RESPONSE_CACHE['TIMEOUT']
+)
+
+
+def is_full_text(using='default'):
+    """return whether a database has PostgreSQL full-text search"""
+    return connections[using].vendor == 'postgresql'
+
+
+def _related_names(field):
+    """return a subquery joining the names linked to the outer recipe"""
+    m2m = Recipe._meta.get_field(field)
+    recipe_id = m2m.m2m_column_name()
+    return Subquery(
+        m2m.remote_field.through.objects.filter(
+            **{recipe_id: OuterRef('pk')}
+        ).values(recipe_id).annotate(
+            names=StringAgg(f'{m2m.m2m_reverse_field_name()}__name', ' ')
+        ).values('names')
+    )
+
+
+def search_vector():
+    """return the expression computing the search vector of a recipe"""
+    config = settings.RECIPE_SEARCH_CONFIG
+    return (
+        SearchVector('title', weight='A', config=config) +
+        SearchVector(_related_names('tags'), weight='B', config=config) +
+        SearchVector(_related_names('ingredients'), weight='B', config=config)
+    )
+
+
+def refresh(queryset):
+    """recompute the search vector of every recipe in queryset
+
+    Runs as a single UPDATE, and only on PostgreSQL where the vector is
+    stored; other databases are searched through the fallback index.
+    """
+    if is_full_text(queryset.db):
+        queryset.update(search_vector=search_vector())
+
+
+def tokenize(text):
+    """split text into lowercase words"""
+    return TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """in-memory word to recipe index of one user's recipes
+
+    Used where PostgreSQL full-text search is unavailable. Every query
+    word must match, as with plainto_tsquery, but words are not stemmed.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(lambda: defaultdict(float))
+
+    def add(self, recipe_id, text, weight):
+        """index the words of text for a recipe"""
+        for word in tokenize(text):
+            self.postings[word][recipe_id] += weight
+
+    def search(self, text):
+        """return (recipe id, rank) of the matches, best first"""
+        words = set(tokenize(text))
+        if not words:
+            return []
+
+        postings = sorted(
+            (self.postings.get(word, {}) for word in words), key=len
+        )
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches.intersection_update(posting)
+
+        ranked = [
+            (recipe_id, sum(posting[recipe_id] for posting in postings))
+            for recipe_id in matches
+        ]
+        ranked.sort(key=lambda match: (-match[1], -match[0]))
+
+        return ranked
+
+    @classmethod
+    def build(cls, user):
+        """index the titles, tag and ingredient names of a user's recipes"""
+        index = cls()
+        recipes = Recipe.objects.filter(user=user)
+        for recipe_id, title in recipes.values_list('id', 'title'):
+            index.add(recipe_id, title, TITLE_WEIGHT)
+
+        for field in ('tags', 'ingredients'):
+            m2m = Recipe._meta.get_field(field)
+            links = m2m.remote_field.through.objects.filter(
+                recipe__user=user
+            ).values_list(
+                m2m.m2m_column_name(),
+                f'{m2m.m2m_reverse_field_name()}__name'
+            )
+            for recipe_id, name in links:
+                index.add(recipe_id, name, RELATED_WEIGHT)
+
+        return index
+
+
+def get_index(user):
+    """return the fallback index of a user, rebuilt when their recipes,
+    tags or ingredients change
+    """
+    version = response_cache.version(user.pk)
+    cached = _indexes.get(user.pk)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    index = InvertedIndex.build(user)
+    _indexes.set(user.pk, (version, index))
+
+    return index
+
+
+def search(queryset, user, text):
+    """filter queryset to recipes matching text, ordered by rank"""
+    if is_full_text(queryset.db):
+        query = SearchQuery(text, config=settings.RECIPE_SEARCH_CONFIG)
+        queryset = queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        )
+    else:
+        ranked = get_index(user).search(text)
+        queryset = queryset.filter(
+            pk__in=[recipe_id for recipe_id, rank in ranked]
+        ).annotate(rank=Case(
+            *[When(pk=recipe_id, then=Value(rank))
+              for recipe_id, rank in ranked],
+            default=Value(0.0),
+            output_field=FloatField()
+        ))
+
+    return queryset.order_by('-rank', '-id')
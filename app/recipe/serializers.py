@@ -1,6 +1,186 @@
+import functools
+
+from django.conf import settings
+from django.db import connections, router
+
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 from core.models import Tag, Ingredient, Recipe
 
+from .compiled import compile_serializer
+from .fields import ImageVariantsField, UserPrimaryKeyRelatedField, to_pk
+
+
+BULK_BATCH_SIZE = 1000
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """list serializer writing rows and M2M links with bulk queries"""
+
+    def _m2m_fields(self):
+        """return the model M2M fields written through the child"""
+        return [
+            field for field in self.child.Meta.model._meta.many_to_many
+            if field.name in self.child.fields
+            and not self.child.fields[field.name].read_only
+        ]
+
+    def to_internal_value(self, data):
+        """validate every item, reporting errors by position"""
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+
+        if len(data) > settings.API_MAX_BULK_ITEMS:
+            raise ValidationError({
+                'non_field_errors': [
+                    f'Ensure there are no more than '
+                    f'{settings.API_MAX_BULK_ITEMS} items.'
+                ]
+            })
+
+        ret = []
+        errors = []
+        for item in data:
+            try:
+                validated = self.child.run_validation(item)
+            except ValidationError as exc:
+                ret.append(None)
+                errors.append(exc.detail)
+            else:
+                ret.append(validated)
+                errors.append({})
+
+        if self.instance is not None:
+            self._resolve_instances(data, ret, errors)
+        self._resolve_related(ret, errors)
+
+        if any(errors):
+            raise ValidationError(errors)
+
+        return ret
+
+    def _resolve_instances(self, data, ret, errors):
+        """match each item of a bulk update to an existing instance"""
+        instances = {obj.pk: obj for obj in self.instance}
+        for item, validated, error in zip(data, ret, errors):
+            try:
+                pk = to_pk(item.get('id'))
+            except AttributeError:
+                pk = None
+            except (TypeError, ValueError):
+                error['id'] = ['Incorrect type. Expected pk value, received '
+                               f'{type(item.get("id")).__name__}.']
+                continue
+
+            if pk not in instances:
+                error['id'] = ['Object does not exist.']
+            elif validated is not None:
+                validated['instance'] = instances[pk]
+
+    def _resolve_related(self, ret, errors):
+        """look up the related ids of every item with one query each"""
+        user = self.context['request'].user
+        for field in self._m2m_fields():
+            ids = {
+                pk for validated in ret if validated
+                for pk in validated.get(field.name, ())
+            }
+            found = field.related_model.objects.filter(
+                user=user, id__in=ids
+            ).in_bulk()
+
+            for validated, error in zip(ret, errors):
+                if not validated or field.name not in validated:
+                    continue
+                missing = [
+                    pk for pk in validated[field.name] if pk not in found
+                ]
+                if missing:
+                    error[field.name] = [
+                        f'Invalid pk "{pk}" - object does not exist.'
+                        for pk in missing
+                    ]
+                validated[field.name] = [
+                    found[pk] for pk in validated[field.name] if pk in found
+                ]
+
+    def _pop_related(self, validated_data):
+        """split M2M values off the validated items"""
+        return [
+            {
+                field.name: item.pop(field.name)
+                for field in self._m2m_fields() if field.name in item
+            }
+            for item in validated_data
+        ]
+
+    def _set_related(self, objs, related):
+        """replace the M2M links of objs with bulk through table writes"""
+        for field in self._m2m_fields():
+            through = field.remote_field.through
+            owner_id = field.m2m_column_name()
+            related_id = field.m2m_reverse_name()
+            changed = [
+                (obj, values[field.name])
+                for obj, values in zip(objs, related) if field.name in values
+            ]
+            if not changed:
+                continue
+
+            through.objects.filter(
+                **{f'{owner_id}__in': [obj.pk for obj, _ in changed]}
+            ).delete()
+            through.objects.bulk_create(
+                [
+                    through(**{owner_id: obj.pk, related_id: value.pk})
+                    for obj, values in changed
+                    for value in dict.fromkeys(values)
+                ],
+                batch_size=BULK_BATCH_SIZE
+            )
+
+    def create(self, validated_data):
+        """insert all items and their M2M links in bulk"""
+        model = self.child.Meta.model
+        related = self._pop_related(validated_data)
+        objs = [model(**item) for item in validated_data]
+
+        connection = connections[router.db_for_write(model)]
+        if connection.features.can_return_rows_from_bulk_insert:
+            objs = model.objects.bulk_create(
+                objs, batch_size=BULK_BATCH_SIZE
+            )
+        else:
+            # primary keys are needed for the M2M links but this backend
+            # cannot return them from a bulk insert
+            for obj in objs:
+                obj.save()
+
+        self._set_related(objs, related)
+
+        return objs
+
+    def update(self, instances, validated_data):
+        """apply all item changes with bulk_update"""
+        model = self.child.Meta.model
+        related = self._pop_related(validated_data)
+        objs = []
+        fields = set()
+        for item in validated_data:
+            obj = item.pop('instance')
+            for attr, value in item.items():
+                setattr(obj, attr, value)
+            fields.update(item)
+            objs.append(obj)
+
+        if fields:
+            model.objects.bulk_update(
+                objs, fields, batch_size=BULK_BATCH_SIZE
+            )
+        self._set_related(objs, related)
+
+        return objs
+
 
 class TagSerializer(serializers.ModelSerializer):
     """serializer for tag object"""
@@ -9,6 +189,7 @@ class TagSerializer(serializers.ModelSerializer):
         model = Tag
         fields = ('id', 'name')
         read_only_fields = ('id',)
+        list_serializer_class = BulkListSerializer
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -18,38 +199,184 @@ class IngredientSerializer(serializers.ModelSerializer):
         model = Ingredient
         fields = ('id', 'name')
         read_only_fields = ('id',)
+        list_serializer_class = BulkListSerializer
+
+
+class TagCountSerializer(TagSerializer):
+    """serializer for tag object with its recipe usage count"""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ('recipe_count',)
+
+
+class IngredientCountSerializer(IngredientSerializer):
+    """serializer for ingredient object with its recipe usage count"""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ('recipe_count',)
 
 
 class RecipeSerializer(serializers.ModelSerializer):
     """serializer for recipe object"""
 
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
 
+    image_variants = ImageVariantsField(source='image')
+
     class Meta:
         model = Recipe
         fields = ('id', 'title', 'time_minutes', 'price', 'link',
-                  'ingredients', 'tags')
+                  'ingredients', 'tags', 'image_variants')
         read_only_fields = ('id',)
 
 
+class RecipeRowSerializer:
+    """read only recipe serializer output built from values() rows
+
+    Skips instantiating models: related ids, or the related rows of
+    nested relations, are read for all rows with one query per relation
+    and the rows are then represented by the compiled serializer.
+    """
+    columns = ('id', 'title', 'time_minutes', 'price', 'link', 'image')
+    related = ('ingredients', 'tags')
+
+    def __init__(self, rows, serializer_class=None, context=None):
+        self.rows = rows
+        self.serializer_class = serializer_class or RecipeSerializer
+        self.context = context or {}
+
+    @classmethod
+    def columns_for(cls, serializer_class):
+        """return the recipe columns a serializer class reads"""
+        return row_plan(serializer_class)[0]
+
+    def _related_rows(self, field, recipe_ids, nested_columns):
+        """return the related ids, or rows when nested, of each recipe"""
+        m2m = Recipe._meta.get_field(field)
+        recipe_id = m2m.m2m_column_name()
+        related = m2m.m2m_reverse_field_name()
+        if nested_columns:
+            columns = [f'{related}__{column}' for column in nested_columns]
+        else:
+            columns = [m2m.m2m_reverse_name()]
+        links = m2m.remote_field.through.objects.filter(
+            **{f'{recipe_id}__in': recipe_ids}
+        ).order_by(m2m.m2m_reverse_name()).values_list(recipe_id, *columns)
+
+        values = {}
+        for recipe, *link in links:
+            values.setdefault(recipe, []).append(
+                dict(zip(nested_columns, link)) if nested_columns
+                else link[0]
+            )
+
+        return values
+
+    @property
+    def data(self):
+        """return the rows as the serializer would represent them"""
+        rows = list(self.rows)
+        if not rows:
+            return []
+
+        recipe_ids = [row['id'] for row in rows]
+        for field, nested_columns in row_plan(self.serializer_class)[1]:
+            values = self._related_rows(field, recipe_ids, nested_columns)
+            for row in rows:
+                row[field] = values.get(row['id'], [])
+
+        represent = compile_serializer(self.serializer_class).bind(
+            self.context
+        )
+
+        return [represent(row) for row in rows]
+
+
+@functools.lru_cache(maxsize=None)
+def row_plan(serializer_class):
+    """return the recipe columns and the (relation, nested columns) pairs
+    a serializer class reads, nested columns empty for plain ids
+    """
+    columns = ['id']
+    relations = []
+    for field in serializer_class().fields.values():
+        if field.write_only:
+            continue
+        source = field.source_attrs[0]
+        if source in RecipeRowSerializer.related:
+            nested = []
+            if isinstance(field, serializers.ListSerializer):
+                nested = list(row_plan(type(field.child))[0])
+            relations.append((source, tuple(nested)))
+        elif source not in columns:
+            columns.append(source)
+
+    return tuple(columns), tuple(relations)
+
+
+# relations that can be nested in recipe reads, with their serializers
+RECIPE_EXPANDABLE = {
+    'ingredients': IngredientSerializer,
+    'tags': TagSerializer,
+}
+
+
+@functools.lru_cache(maxsize=256)
+def recipe_serializer_class(fields, expand):
+    """return a recipe read serializer with only fields, in their declared
+    order, and the expand relations nested
+    """
+    attrs = {
+        name: RECIPE_EXPANDABLE[name](many=True, read_only=True)
+        for name in expand if name in fields
+    }
+    attrs['Meta'] = type('Meta', (RecipeSerializer.Meta,), {
+        'fields': fields
+    })
+
+    return type('SparseRecipeSerializer', (RecipeSerializer,), attrs)
+
+
 class RecipeDetailSerializer(RecipeSerializer):
     """serializer for recipe detail"""
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
 
 
+class RecipeBulkSerializer(RecipeSerializer):
+    """serializer for writing many recipes in one request
+
+    Related ids are plain integers here, the list serializer resolves
+    them for every recipe at once.
+    """
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+    tags = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+
+    class Meta(RecipeSerializer.Meta):
+        list_serializer_class = BulkListSerializer
+
+
 class RecipeImageSerializer(serializers.ModelSerializer):
     """serializer for uploading images to recipes"""
+    image_variants = ImageVariantsField(source='image')
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'image_variants')
         read_only_fields = ('id',)
@@ -0,0 +1,103 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, \
+                                     post_save, pre_delete
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe
+
+from . import images, search
+from .cache import response_cache
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def invalidate_user_collection(sender, instance, **kwargs):
+    """invalidate cached responses of the owner of a changed object"""
+    response_cache.bump(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_user_collection_links(sender, instance, action, **kwargs):
+    """invalidate cached responses when recipe links change"""
+    if action.startswith('post_'):
+        response_cache.bump(instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_image(sender, instance, **kwargs):
+    """delete the image of a deleted recipe if no other recipe uses it"""
+    name = instance.image.name
+    if name:
+        transaction.on_commit(lambda: images.release(name))
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_search(sender, instance, using, update_fields, **kwargs):
+    """recompute the search vector of a saved recipe"""
+    if update_fields is not None and 'title' not in update_fields:
+        return
+
+    search.refresh(Recipe.objects.using(using).filter(pk=instance.pk))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def refresh_linked_recipe_search(sender, instance, action, reverse, pk_set,
+                                 using, **kwargs):
+    """recompute the search vectors of recipes whose links changed"""
+    if not search.is_full_text(using):
+        return
+
+    if not reverse:
+        recipe_ids = [instance.pk]
+    elif action == 'pre_clear':
+        # the cleared recipes can only be read before the links go
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('pk', flat=True)
+        )
+        return
+    elif action == 'post_clear':
+        recipe_ids = getattr(instance, '_search_recipe_ids', [])
+    else:
+        recipe_ids = pk_set
+
+    if action.startswith('post_') and recipe_ids:
+        search.refresh(
+            Recipe.objects.using(using).filter(pk__in=recipe_ids)
+        )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def refresh_renamed_search(sender, instance, created, using, **kwargs):
+    """recompute the search vectors of recipes using a renamed object"""
+    if not created:
+        search.refresh(
+            Recipe.objects.using(using).filter(
+                pk__in=instance.recipe_set.values('pk')
+            )
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def collect_deleted_search(sender, instance, using, **kwargs):
+    """remember the recipes of an object before its links are deleted"""
+    if search.is_full_text(using):
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('pk', flat=True)
+        )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def refresh_deleted_search(sender, instance, using, **kwargs):
+    """drop a deleted object's name from the search vectors"""
+    recipe_ids = getattr(instance, '_search_recipe_ids', None)
+    if recipe_ids:
+        search.refresh(Recipe.objects.using(using).filter(pk__in=recipe_ids))
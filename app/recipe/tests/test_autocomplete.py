@@ -0,0 +1,152 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+
+from recipe.autocomplete import AutocompleteCache, autocomplete_cache
+from recipe.cache import response_cache
+
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class AutocompleteCacheTests(TestCase):
+    """test the in-memory autocomplete results"""
+
+    def setUp(self):
+        self.cache = AutocompleteCache()
+        self.rows = [
+            {'id': 1, 'name': 'Cheddar'},
+            {'id': 2, 'name': 'Chicken'},
+            {'id': 3, 'name': 'Peach'},
+        ]
+
+    def test_exact_hit(self):
+        """test stored rows are returned for the same text"""
+        self.cache.set('scope', '1', 'ch', self.rows)
+
+        self.assertEqual(self.cache.get('scope', '1', 'ch', 10), self.rows)
+        self.assertIsNone(self.cache.get('other', '1', 'ch', 10))
+
+    def test_new_version_misses(self):
+        """test rows of an earlier collection version are not returned"""
+        self.cache.set('scope', '1', 'ch', self.rows)
+
+        self.assertIsNone(self.cache.get('scope', '2', 'ch', 10))
+
+    def test_narrow_complete_prefix(self):
+        """test rows are narrowed from a shorter prefix, prefixes first"""
+        self.cache.set('scope', '1', 'c', self.rows)
+
+        self.assertIsNone(self.cache.get('scope', '1', 'ch', 10))
+        self.assertEqual(
+            self.cache.get('scope', '1', 'ch', 10, narrow=True),
+            [self.rows[0], self.rows[1], self.rows[2]]
+        )
+        self.assertEqual(
+            self.cache.get('scope', '1', 'chi', 10, narrow=True),
+            [self.rows[1]]
+        )
+
+    def test_no_narrow_from_truncated_prefix(self):
+        """test a prefix whose rows were cut off by the limit is unused"""
+        self.cache.set('scope', '1', 'c', self.rows)
+
+        self.assertIsNone(self.cache.get('scope', '1', 'ch', 3, narrow=True))
+
+
+class AutocompleteApiTests(TestCase):
+    """test the q parameter of the tag and ingredient APIs"""
+
+    def setUp(self):
+        response_cache.clear()
+        autocomplete_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPassword123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _names(self, url, text):
+        res = self.client.get(url, {'q': text})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in res.data]
+
+    def test_prefix_matches_first(self):
+        """test names starting with q come before names containing it"""
+        for name in ('Peach', 'Cheddar', 'Chicken', 'Rice'):
+            Tag.objects.create(user=self.user, name=name)
+
+        self.assertEqual(
+            self._names(TAGS_URL, 'CH'),
+            ['Cheddar', 'Chicken', 'Peach']
+        )
+
+    def test_limited_to_user(self):
+        """test names of other users are never suggested"""
+        other = get_user_model().objects.create_user(
+            'other@tru.com',
+            'testPassword123'
+        )
+        Ingredient.objects.create(user=other, name='Salt')
+        Ingredient.objects.create(user=self.user, name='Salmon')
+
+        self.assertEqual(self._names(INGREDIENTS_URL, 'sal'), ['Salmon'])
+
+    @override_settings(RECIPE_AUTOCOMPLETE_LIMIT=2)
+    def test_results_capped(self):
+        """test no more than the configured number of names is returned"""
+        for n in range(5):
+            Tag.objects.create(user=self.user, name=f'Tag {n}')
+
+        self.assertEqual(self._names(TAGS_URL, 'tag'), ['Tag 0', 'Tag 1'])
+
+    def test_keystrokes_narrowed_in_memory(self):
+        """test longer text is answered without querying the database"""
+        for name in ('Cheddar', 'Chicken', 'Rice'):
+            Tag.objects.create(user=self.user, name=name)
+        self._names(TAGS_URL, 'c')
+
+        with CaptureQueriesContext(connection) as queries:
+            names = self._names(TAGS_URL, 'chi')
+
+        self.assertEqual(names, ['Chicken'])
+        self.assertEqual(len(queries), 0)
+
+    def test_changes_seen(self):
+        """test new names are suggested right after they are created"""
+        Tag.objects.create(user=self.user, name='Cheddar')
+        self.assertEqual(self._names(TAGS_URL, 'ch'), ['Cheddar'])
+
+        self.client.post(TAGS_URL, {'name': 'Chives'})
+
+        self.assertEqual(self._names(TAGS_URL, 'ch'), ['Cheddar', 'Chives'])
+
+    def test_filters_apply(self):
+        """test assigned_only and include_counts apply to suggestions"""
+        tag = Tag.objects.create(user=self.user, name='Chili')
+        Tag.objects.create(user=self.user, name='Chard')
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Stew',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.tags.add(tag)
+
+        res = self.client.get(
+            TAGS_URL,
+            {'q': 'ch', 'assigned_only': 1, 'include_counts': 1}
+        )
+
+        self.assertEqual(
+            res.data,
+            [{'id': tag.id, 'name': 'Chili', 'recipe_count': 1}]
+        )
@@ -0,0 +1,228 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPE_BULK_URL = reverse('recipe:recipe-bulk')
+TAGS_BULK_URL = reverse('recipe:tag-bulk')
+
+
+def sample_recipe(user, **kwargs):
+    """create and return a sample recipe"""
+    defaults = {
+        'title': 'SampleTitle',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(kwargs)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class BulkApiTests(TestCase):
+    """test the bulk create, update and delete endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_tags(self):
+        """test creating many tags in one request"""
+        payload = [{'name': 'Vegan'}, {'name': 'Dessert'}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['name'] for item in res.data],
+                         ['Vegan', 'Dessert'])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_create_recipes_with_relations(self):
+        """test creating recipes links tags and ingredients"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Tofu')
+        payload = [
+            {'title': f'Recipe {i}', 'time_minutes': 10, 'price': '5.00',
+             'tags': [tag.id], 'ingredients': [ingredient.id]}
+            for i in range(20)
+        ]
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 20)
+        self.assertEqual(res.data[0]['title'], 'Recipe 0')
+        self.assertEqual(res.data[0]['tags'], [tag.id])
+        self.assertEqual(tag.recipe_set.count(), 20)
+        self.assertEqual(ingredient.recipe_set.count(), 20)
+
+    def test_bulk_create_reports_item_errors(self):
+        """test invalid items are reported by position and nothing saved"""
+        user2 = get_user_model().objects.create_user(
+            'test2@tru.com',
+            'testPass123'
+        )
+        foreign_tag = Tag.objects.create(user=user2, name='Private')
+        payload = [
+            {'title': 'Valid', 'time_minutes': 10, 'price': '5.00'},
+            {'title': 'No time', 'price': '5.00'},
+            {'title': 'Foreign tag', 'time_minutes': 10, 'price': '5.00',
+             'tags': [foreign_tag.id]},
+        ]
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('time_minutes', res.data[1])
+        self.assertIn('tags', res.data[2])
+        self.assertFalse(Recipe.objects.exists())
+
+    @override_settings(API_MAX_BULK_ITEMS=2)
+    def test_bulk_create_limited(self):
+        """test the number of items in one request is capped"""
+        payload = [{'name': 'Vegan'}] * 3
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Tag.objects.exists())
+
+    def test_bulk_update_recipes(self):
+        """test partially updating many recipes in one request"""
+        recipe1 = sample_recipe(user=self.user)
+        recipe2 = sample_recipe(user=self.user)
+        recipe2.tags.add(Tag.objects.create(user=self.user, name='Old'))
+        tag = Tag.objects.create(user=self.user, name='New')
+        payload = [
+            {'id': recipe1.id, 'title': 'Renamed'},
+            {'id': recipe2.id, 'tags': [tag.id]},
+        ]
+
+        res = self.client.patch(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe1.refresh_from_db()
+        self.assertEqual(recipe1.title, 'Renamed')
+        self.assertEqual(list(recipe2.tags.all()), [tag])
+
+    def test_bulk_update_other_users_recipe(self):
+        """test recipes of other users cannot be bulk updated"""
+        user2 = get_user_model().objects.create_user(
+            'test2@tru.com',
+            'testPass123'
+        )
+        recipe = sample_recipe(user=user2)
+
+        res = self.client.patch(
+            RECIPE_BULK_URL,
+            [{'id': recipe.id, 'title': 'Stolen'}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data[0])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'SampleTitle')
+
+    @patch('recipe.search.refresh')
+    def test_bulk_update_refreshes_written_recipes(self, refresh):
+        """test only the updated recipes get new search vectors"""
+        recipe = sample_recipe(user=self.user)
+        sample_recipe(user=self.user)
+        refresh.reset_mock()
+
+        self.client.patch(
+            RECIPE_BULK_URL,
+            [{'id': recipe.id, 'title': 'Renamed'}],
+            format='json'
+        )
+
+        refresh.assert_called_once()
+        self.assertEqual(list(refresh.call_args[0][0]), [recipe])
+
+    @patch('recipe.search.refresh')
+    def test_bulk_update_tags_refreshes_linked_recipes(self, refresh):
+        """test renaming tags refreshes only the recipes using them"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        other = Tag.objects.create(user=self.user, name='Dessert')
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(tag)
+        sample_recipe(user=self.user).tags.add(other)
+        refresh.reset_mock()
+
+        self.client.patch(
+            TAGS_BULK_URL,
+            [{'id': tag.id, 'name': 'Plant based'}],
+            format='json'
+        )
+
+        refresh.assert_called_once()
+        self.assertEqual(list(refresh.call_args[0][0]), [recipe])
+
+    def test_bulk_update_malformed_ids(self):
+        """test ids that are not whole integers match no recipe"""
+        recipe = sample_recipe(user=self.user)
+
+        for pk in (True, recipe.id + 0.9, f' {recipe.id} '):
+            res = self.client.patch(
+                RECIPE_BULK_URL,
+                [{'id': pk, 'title': 'Renamed'}],
+                format='json'
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('id', res.data[0])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'SampleTitle')
+
+    def test_bulk_delete_recipes(self):
+        """test deleting many recipes in one request"""
+        recipes = [sample_recipe(user=self.user) for _ in range(3)]
+
+        res = self.client.delete(
+            RECIPE_BULK_URL,
+            {'ids': [recipe.id for recipe in recipes[:2]]},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(Recipe.objects.all()), [recipes[2]])
+
+    def test_bulk_delete_missing_ids(self):
+        """test nothing is deleted when an id does not exist"""
+        recipe = sample_recipe(user=self.user)
+
+        res = self.client.delete(
+            RECIPE_BULK_URL,
+            {'ids': [recipe.id, recipe.id + 100]},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+    def test_bulk_delete_malformed_ids(self):
+        """test nothing is deleted when an id is not an integer"""
+        recipe = sample_recipe(user=self.user)
+
+        res = self.client.delete(
+            RECIPE_BULK_URL,
+            {'ids': [recipe.id, 'x', None, True, 1.5]},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['ids']), 4)
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
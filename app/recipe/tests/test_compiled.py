@@ -0,0 +1,153 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+
+from rest_framework import serializers as drf_serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from core.models import Tag, Ingredient, Recipe
+
+from recipe import serializers
+from recipe.compiled import ReadSerializer, compile_serializer
+from recipe.views import RecipeViewSet, TagViewSet
+
+
+class TagNameSerializer(serializers.TagSerializer):
+    """serializer with a field the compiler does not know"""
+    label = drf_serializers.SerializerMethodField()
+
+    class Meta(serializers.TagSerializer.Meta):
+        fields = ('id', 'name', 'label')
+
+    def get_label(self, obj):
+        return f'#{obj.name} ({self.context["suffix"]})'
+
+
+class CompiledSerializerTests(TestCase):
+    """test compiled serializers render exactly like the serializers"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.request = RequestFactory().get('/')
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ('Vegan', 'Crème', 'Quick')]
+        ingredients = [Ingredient.objects.create(user=self.user, name=name)
+                       for name in ('Salt', 'Flour')]
+        for n, price in enumerate(('5', '7.5', '0.01')):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe  {n}',
+                time_minutes=n,
+                price=price,
+                link='https://example.com' if n else ''
+            )
+            recipe.tags.add(*tags[n:])
+            recipe.ingredients.add(*ingredients[:n])
+        Recipe.objects.filter(time_minutes=1).update(
+            image='uploads/recipe/abc.jpg'
+        )
+
+    def assertSameBytes(self, serializer_class, instance, many=False,
+                        context=None):
+        context = context or {'request': self.request}
+        expected = serializer_class(instance, many=many, context=context)
+        compiled = ReadSerializer(
+            serializer_class, instance, many=many, context=context
+        )
+
+        self.assertEqual(
+            JSONRenderer().render(compiled.data),
+            JSONRenderer().render(expected.data)
+        )
+
+    def test_tags_and_ingredients(self):
+        """test tag and ingredient serializers, with and without counts"""
+        self.assertSameBytes(
+            serializers.TagSerializer, Tag.objects.order_by('id'), many=True
+        )
+        self.assertSameBytes(
+            serializers.IngredientSerializer, Ingredient.objects.first()
+        )
+        self.assertSameBytes(
+            serializers.TagCountSerializer,
+            Tag.objects.with_recipe_count().order_by('id'),
+            many=True
+        )
+        self.assertSameBytes(
+            serializers.IngredientCountSerializer,
+            Ingredient.objects.with_recipe_count().order_by('id'),
+            many=True
+        )
+
+    def test_recipes(self):
+        """test recipe and nested recipe detail serializers"""
+        recipes = Recipe.objects.order_by('id').prefetch_related(
+            'tags', 'ingredients'
+        )
+
+        self.assertSameBytes(serializers.RecipeSerializer, recipes, many=True)
+        for recipe in recipes:
+            self.assertSameBytes(serializers.RecipeDetailSerializer, recipe)
+
+    def test_value_rows(self):
+        """test values() rows with related ids render like instances"""
+        recipe = Recipe.objects.get(time_minutes=1)
+        row = Recipe.objects.filter(pk=recipe.pk).values(
+            'id', 'title', 'time_minutes', 'price', 'link', 'image'
+        ).get()
+        row['tags'] = sorted(recipe.tags.values_list('id', flat=True))
+        row['ingredients'] = sorted(
+            recipe.ingredients.values_list('id', flat=True)
+        )
+        context = {'request': self.request}
+        represent = compile_serializer(
+            serializers.RecipeSerializer
+        ).bind(context)
+        expected = serializers.RecipeSerializer(recipe, context=context).data
+        expected['tags'].sort()
+        expected['ingredients'].sort()
+
+        self.assertEqual(
+            JSONRenderer().render(represent(row)),
+            JSONRenderer().render(expected)
+        )
+
+    def test_unknown_fields_fall_back(self):
+        """test fields without a compiled form use the bound field"""
+        self.assertSameBytes(
+            TagNameSerializer,
+            Tag.objects.order_by('id'),
+            many=True,
+            context={'suffix': 'tag'}
+        )
+
+    def test_compiled_once_per_class(self):
+        """test a serializer class is only compiled once"""
+        self.assertIs(
+            compile_serializer(serializers.TagSerializer),
+            compile_serializer(serializers.TagSerializer)
+        )
+
+    def test_used_for_reads_only(self):
+        """test views use compiled serializers for list and retrieve"""
+        request = Request(self.request)
+        for viewset, action in ((TagViewSet, 'list'),
+                                (RecipeViewSet, 'retrieve')):
+            view = viewset(
+                action=action, request=request, format_kwarg=None
+            )
+            self.assertIsInstance(
+                view.get_serializer(Tag.objects.none(), many=True),
+                ReadSerializer
+            )
+
+        view = TagViewSet(
+            action='create', request=request, format_kwarg=None
+        )
+        self.assertIsInstance(
+            view.get_serializer(data={'name': 'New'}),
+            serializers.TagSerializer
+        )
@@ -0,0 +1,128 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """return recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class ConditionalGetTests(TestCase):
+    """test ETag and Last-Modified handling on the recipe API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_validators_sent(self):
+        """test list responses carry ETag and Last-Modified"""
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['ETag'].startswith('W/"'))
+        self.assertIn('Last-Modified', res)
+        self.assertIn('private', res['Cache-Control'])
+
+    def test_matching_etag_not_modified(self):
+        """test a matching If-None-Match gets 304 without queries"""
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_change_invalidates_etag(self):
+        """test the ETag changes when the user's collection changes"""
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        Tag.objects.create(user=self.user, name='Vegan')
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_etag_depends_on_query(self):
+        """test different query parameters get different ETags"""
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        res = self.client.get(
+            TAGS_URL, {'assigned_only': 1}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_etag_per_user(self):
+        """test another user's changes keep the ETag valid"""
+        user2 = get_user_model().objects.create_user(
+            'test2@tru.com',
+            'testPass123'
+        )
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        Recipe.objects.create(
+            user=user2, title='Curry', time_minutes=10, price=5.00
+        )
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since(self):
+        """test If-Modified-Since at or after the last change gets 304"""
+        res = self.client.get(TAGS_URL)
+        last_modified = res['Last-Modified']
+
+        res = self.client.get(
+            TAGS_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        res = self.client.get(
+            TAGS_URL, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 10)
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_change_in_same_second_modified(self):
+        """test a change right after a read moves Last-Modified"""
+        last_modified = self.client.get(TAGS_URL)['Last-Modified']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(user=self.user, name='Vegan')
+        res = self.client.get(
+            TAGS_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['Last-Modified'], last_modified)
+
+    def test_if_none_match_any(self):
+        """test If-None-Match: * only matches an existing recipe"""
+        recipe = Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=10, price=5.00
+        )
+
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        res = self.client.get(
+            detail_url(recipe.id + 1), HTTP_IF_NONE_MATCH='*'
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,175 @@
+import os
+import tempfile
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+from recipe import images
+
+
+VARIANTS = {'thumbnail': (50, 50), 'large': (300, 300)}
+
+
+def image_upload_url(recipe_id):
+    """return image upload url"""
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+@override_settings(RECIPE_IMAGE_VARIANTS=VARIANTS)
+class ImageProcessingTests(TestCase):
+    """test generating resized variants of recipe images"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='SampleTitle',
+            time_minutes=10,
+            price=5.00
+        )
+
+    def tearDown(self):
+        if self.recipe.image:
+            for name in images.variant_names(self.recipe.image.name).values():
+                default_storage.delete(name)
+            self.recipe.image.delete()
+
+    def _upload(self, size, mode='RGB', fmt='JPEG', suffix='.jpg'):
+        """upload a generated image and wait for its processing"""
+        with tempfile.NamedTemporaryFile(suffix=suffix) as ntf:
+            Image.new(mode, size).save(ntf, format=fmt)
+            ntf.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    image_upload_url(self.recipe.id),
+                    {'image': ntf},
+                    format='multipart'
+                )
+
+        images.wait(timeout=10)
+        self.recipe.refresh_from_db()
+
+        return res
+
+    def test_variants_generated(self):
+        """test uploading an image creates resized JPEG variants"""
+        res = self._upload((900, 600))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data['image_variants']), set(VARIANTS))
+
+        names = images.variant_names(self.recipe.image.name)
+        for variant, (width, height) in VARIANTS.items():
+            with default_storage.open(names[variant]) as f:
+                image = Image.open(f)
+                self.assertEqual(image.format, 'JPEG')
+                self.assertLessEqual(image.width, width)
+                self.assertLessEqual(image.height, height)
+
+        with default_storage.open(names['thumbnail']) as f:
+            self.assertEqual(Image.open(f).size, (50, 33))
+
+    def test_transparent_png_converted(self):
+        """test images with alpha are converted for JPEG variants"""
+        self._upload((100, 100), mode='RGBA', fmt='PNG', suffix='.png')
+
+        name = images.variant_name(self.recipe.image.name, 'large')
+        self.assertTrue(default_storage.exists(name))
+
+    def test_no_variants_without_image(self):
+        """test recipes without image report no variants"""
+        res = self.client.get(
+            reverse('recipe:recipe-detail', args=[self.recipe.id])
+        )
+
+        self.assertIsNone(res.data['image_variants'])
+
+
+class ImageUploadLimitTests(TestCase):
+    """test the limits enforced while streaming image uploads"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='SampleTitle',
+            time_minutes=10,
+            price=5.00
+        )
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.recipe.image.delete()
+        self.temp_dir.cleanup()
+
+    def _upload(self, size, fmt='PNG', suffix='.png'):
+        """upload a generated noise image"""
+        with override_settings(FILE_UPLOAD_TEMP_DIR=self.temp_dir.name), \
+                tempfile.NamedTemporaryFile(suffix=suffix) as ntf:
+            Image.effect_noise(size, 100).convert('RGB').save(
+                ntf, format=fmt
+            )
+            ntf.seek(0)
+            res = self.client.post(
+                image_upload_url(self.recipe.id),
+                {'image': ntf},
+                format='multipart'
+            )
+
+        self.recipe.refresh_from_db()
+
+        return res
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=10 * 1024)
+    def test_too_many_bytes_rejected(self):
+        """test uploads over the byte limit are rejected"""
+        res = self._upload((400, 400))
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels_rejected(self):
+        """test images over the pixel limit are rejected"""
+        res = self._upload((20, 20))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+        self.assertFalse(self.recipe.image)
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_unsupported_format_rejected(self):
+        """test image formats outside the allowed list are rejected"""
+        res = self._upload((20, 20), fmt='BMP', suffix='.bmp')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.recipe.image)
+
+    def test_upload_streamed_to_disk(self):
+        """test accepted uploads are moved out of the temporary dir"""
+        res = self._upload((20, 20))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(default_storage.exists(self.recipe.image.name))
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
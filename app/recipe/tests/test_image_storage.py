@@ -0,0 +1,150 @@
+import tempfile
+from io import StringIO
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+from recipe import images
+
+
+def image_upload_url(recipe_id):
+    """return image upload url"""
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+@override_settings(
+    RECIPE_IMAGE_GRACE_SECONDS=0,
+    RECIPE_IMAGE_VARIANTS={'thumbnail': (10, 10)}
+)
+class ImageStorageTests(TestCase):
+    """test content addressed storage of recipe images"""
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        media_settings = override_settings(MEDIA_ROOT=self.media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.storage = images.image_storage()
+
+    def tearDown(self):
+        self.media_root.cleanup()
+
+    def _recipe(self):
+        """create and return a sample recipe"""
+        return Recipe.objects.create(
+            user=self.user,
+            title='SampleTitle',
+            time_minutes=10,
+            price=5.00
+        )
+
+    def _upload(self, recipe, color='red'):
+        """upload a small image to a recipe and return its stored name"""
+        with tempfile.NamedTemporaryFile(suffix='.png') as ntf:
+            Image.new('RGB', (20, 20), color).save(ntf, format='PNG')
+            ntf.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    image_upload_url(recipe.id),
+                    {'image': ntf},
+                    format='multipart'
+                )
+
+        images.wait(timeout=10)
+        recipe.refresh_from_db()
+
+        return recipe.image.name
+
+    def test_identical_uploads_deduplicated(self):
+        """test the same image uploaded twice is stored once"""
+        name1 = self._upload(self._recipe())
+        name2 = self._upload(self._recipe())
+
+        self.assertEqual(name1, name2)
+        _, files = self.storage.listdir(images.IMAGES_DIR)
+        self.assertEqual(files, [name1.rsplit('/', 1)[1]])
+
+    def test_replaced_image_released(self):
+        """test replacing an image deletes the unreferenced old file"""
+        recipe = self._recipe()
+        old_name = self._upload(recipe, 'red')
+
+        new_name = self._upload(recipe, 'blue')
+
+        self.assertNotEqual(old_name, new_name)
+        self.assertFalse(self.storage.exists(old_name))
+        self.assertFalse(
+            self.storage.exists(images.variant_name(old_name, 'thumbnail'))
+        )
+        self.assertTrue(self.storage.exists(new_name))
+
+    def test_shared_image_kept(self):
+        """test an image is kept while another recipe references it"""
+        recipe1 = self._recipe()
+        name = self._upload(recipe1, 'red')
+        self._upload(self._recipe(), 'red')
+
+        self._upload(recipe1, 'blue')
+
+        self.assertTrue(self.storage.exists(name))
+
+    def test_deleted_recipe_image_released(self):
+        """test deleting a recipe deletes its unreferenced image"""
+        recipe = self._recipe()
+        name = self._upload(recipe)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+
+        self.assertFalse(self.storage.exists(name))
+
+    def test_cleanup_command(self):
+        """test orphaned images and variants are garbage collected"""
+        name = self._upload(self._recipe())
+        orphan = self.storage.save(
+            'uploads/recipe/orphan.png', ContentFile(b'orphan')
+        )
+        orphan_variant = self.storage.save(
+            images.variant_name('gone.png', 'thumbnail'), ContentFile(b'')
+        )
+
+        out = StringIO()
+        call_command('cleanup_recipe_images', batch_size=1, stdout=out)
+
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertFalse(self.storage.exists(orphan_variant))
+        self.assertTrue(self.storage.exists(name))
+        self.assertTrue(
+            self.storage.exists(images.variant_name(name, 'thumbnail'))
+        )
+
+    def test_cleanup_respects_grace_period(self):
+        """test recently stored orphans and variants are kept"""
+        orphan = self.storage.save(
+            'uploads/recipe/orphan.png', ContentFile(b'orphan')
+        )
+        # the variant of an image uploaded after the originals were listed
+        variant = self.storage.save(
+            images.variant_name('new.png', 'thumbnail'), ContentFile(b'')
+        )
+
+        with override_settings(RECIPE_IMAGE_GRACE_SECONDS=3600):
+            call_command('cleanup_recipe_images', stdout=StringIO())
+
+        self.assertTrue(self.storage.exists(orphan))
+        self.assertTrue(self.storage.exists(variant))
@@ -48,8 +48,8 @@ class PrivateIngredientsAPITest(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """test that ingredients belong to authenticated user"""
@@ -65,8 +65,8 @@ class PrivateIngredientsAPITest(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ing.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ing.name)
 
     def test_create_ingredients(self):
         """test that authenticated user is able to create ingredient"""
@@ -110,8 +110,8 @@ class PrivateIngredientsAPITest(TestCase):
         serializer1 = IngredientSerializer(ing1)
         serializer2 = IngredientSerializer(ing2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_tags_assigned_unique(self):
         """tags returned should be unique"""
@@ -139,6 +139,29 @@ class PrivateIngredientsAPITest(TestCase):
         serializer1 = IngredientSerializer(ing1)
         serializer2 = IngredientSerializer(ing2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertEqual(len(res.data), 1)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertNotIn(serializer2.data, res.data['results'])
+
+    def test_retrieve_assigned_ingredients_with_counts(self):
+        """test assigned ingredients can include their recipe counts"""
+        ing1 = Ingredient.objects.create(user=self.user, name='Eggs')
+        Ingredient.objects.create(user=self.user, name='Cheese')
+
+        recipe = Recipe.objects.create(
+            title='Eggs benedict',
+            time_minutes=30,
+            price=12.00,
+            user=self.user
+        )
+        recipe.ingredients.add(ing1)
+
+        res = self.client.get(
+            INGREDIENTS_URL,
+            {'assigned_only': 1, 'include_counts': 1}
+        )
+
+        self.assertEqual(
+            res.data['results'],
+            [{'id': ing1.id, 'name': ing1.name, 'recipe_count': 1}]
+        )
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def sample_recipe(user, **kwargs):
+    """create and return a sample recipe"""
+    defaults = {
+        'title': 'SampleTitle',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(kwargs)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PaginationTests(TestCase):
+    """test cursor pagination of the recipe API listings"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _walk(self, url, page_size):
+        """follow next links and return every page of results"""
+        pages = []
+        res = self.client.get(url, {'page_size': page_size})
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data['results'])
+            if not res.data['next']:
+                return pages
+            res = self.client.get(res.data['next'])
+
+    def test_recipes_paginated_newest_first(self):
+        """test walking recipe pages returns every recipe once"""
+        recipes = [sample_recipe(user=self.user) for _ in range(5)]
+
+        pages = self._walk(RECIPE_URL, 2)
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        ids = [item['id'] for page in pages for item in page]
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+
+    def test_tags_paginated_by_name(self):
+        """test walking tag pages keeps the name ordering"""
+        for name in ('Vegan', 'Desert', 'Dinner', 'Breakfast', 'Desert'):
+            Tag.objects.create(user=self.user, name=name)
+
+        pages = self._walk(TAGS_URL, 2)
+
+        names = [item['name'] for page in pages for item in page]
+        self.assertEqual(
+            names,
+            ['Vegan', 'Dinner', 'Desert', 'Desert', 'Breakfast']
+        )
+        ids = [item['id'] for page in pages for item in page]
+        self.assertEqual(len(set(ids)), 5)
+
+    @override_settings(API_MAX_PAGE_SIZE=3)
+    def test_page_size_capped(self):
+        """test the requested page size cannot exceed the maximum"""
+        for _ in range(5):
+            sample_recipe(user=self.user)
+
+        res = self.client.get(RECIPE_URL, {'page_size': 100})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 3)
+        self.assertIsNotNone(res.data['next'])
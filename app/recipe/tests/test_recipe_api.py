@@ -4,7 +4,9 @@ import os
 from PIL import Image
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -87,7 +89,7 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipes_limited_to_user(self):
         """test retrieving recipes for user"""
@@ -104,8 +106,8 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data['results'], serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
 
     def test_view_recipe_detail(self):
         """test viewing a detail"""
@@ -180,6 +182,82 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(ingredient1, ings)
         self.assertIn(ingredient2, ings)
 
+    def test_create_recipe_with_other_users_tag(self):
+        """test tags of another user cannot be assigned"""
+        user2 = get_user_model().objects.create_user('test2@tru.com',
+                                                     'testPass123')
+        tag = sample_tag(user=user2, name='Private')
+
+        payload = {
+            'title': 'Chocolate cheesecake',
+            'time_minutes': 30,
+            'price': 5.00,
+            'tags': [tag.id]
+        }
+
+        res = self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_recipe_reports_all_invalid_ids(self):
+        """test every missing or malformed id is reported at once"""
+        tag = sample_tag(user=self.user)
+
+        payload = {
+            'title': 'Chocolate cheesecake',
+            'time_minutes': 30,
+            'price': 5.00,
+            'tags': [tag.id, tag.id + 100, tag.id + 200, 'abc']
+        }
+
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['tags']), 3)
+
+    def test_create_recipe_rejects_fractional_ids(self):
+        """test ids that are not whole integers link nothing"""
+        tag = sample_tag(user=self.user)
+
+        payload = {
+            'title': 'Chocolate cheesecake',
+            'time_minutes': 30,
+            'price': 5.00,
+            'tags': [tag.id + 0.5, True]
+        }
+
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['tags']), 2)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_recipe_tag_lookup_batched(self):
+        """test related ids are validated with a single query"""
+        tags = [sample_tag(user=self.user, name=f'Tag {i}')
+                for i in range(10)]
+        payload = {
+            'title': 'Chocolate cheesecake',
+            'time_minutes': 30,
+            'price': 5.00,
+            'ingredients': [],
+        }
+
+        with CaptureQueriesContext(connection) as one_tag:
+            self.client.post(
+                RECIPE_URL, {**payload, 'tags': [tags[0].id]}, format='json'
+            )
+        with CaptureQueriesContext(connection) as ten_tags:
+            res = self.client.post(
+                RECIPE_URL,
+                {**payload, 'tags': [tag.id for tag in tags]},
+                format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(ten_tags), len(one_tag))
+
     def test_partial_update_recipe(self):
         """test updating a recipe with patch"""
         recipe = sample_recipe(user=self.user)
@@ -220,6 +298,69 @@ class PrivateRecipeApiTests(TestCase):
 
         self.assertEqual(len(recipe.tags.all()), 0)
 
+    def test_filter_recipes_by_time_and_price(self):
+        """Test max_time, min_price and max_price filter inclusively"""
+        quick = sample_recipe(user=self.user, time_minutes=30, price=9.50)
+        sample_recipe(user=self.user, time_minutes=31, price=9.50)
+        sample_recipe(user=self.user, time_minutes=20, price=12.00)
+        sample_recipe(user=self.user, time_minutes=20, price=2.00)
+
+        res = self.client.get(
+            RECIPE_URL,
+            {'max_time': 30, 'min_price': '5', 'max_price': '10.00'}
+        )
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [quick.id])
+
+    def test_filter_recipes_invalid_range(self):
+        """Test malformed range parameters are rejected by name"""
+        res = self.client.get(
+            RECIPE_URL,
+            {'max_time': '-1', 'max_price': 'cheap'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(res.data), {'max_time', 'max_price'})
+
+    def test_order_recipes(self):
+        """Test ordering sorts on the field with id breaking ties"""
+        recipe1 = sample_recipe(user=self.user, time_minutes=20, price=3)
+        recipe2 = sample_recipe(user=self.user, time_minutes=10, price=3)
+        recipe3 = sample_recipe(user=self.user, time_minutes=20, price=1)
+
+        res = self.client.get(RECIPE_URL, {'ordering': 'time_minutes'})
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [recipe2.id, recipe1.id, recipe3.id])
+
+        res = self.client.get(RECIPE_URL, {'ordering': '-price'})
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [recipe2.id, recipe1.id, recipe3.id])
+
+    def test_order_recipes_pages(self):
+        """Test cursor pages follow the requested ordering"""
+        recipes = [sample_recipe(user=self.user, time_minutes=minutes)
+                   for minutes in (5, 15, 5, 10)]
+
+        ids = []
+        url = RECIPE_URL + '?ordering=time_minutes&page_size=1'
+        while url:
+            res = self.client.get(url)
+            ids += [item['id'] for item in res.data['results']]
+            url = res.data['next']
+
+        self.assertEqual(
+            ids,
+            [recipes[0].id, recipes[2].id, recipes[3].id, recipes[1].id]
+        )
+
+    def test_order_recipes_invalid(self):
+        """Test orderings outside the whitelist are rejected"""
+        res = self.client.get(RECIPE_URL, {'ordering': 'user__password'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', res.data)
+
 
 class RecipeImageUploadTests(TestCase):
 
@@ -275,9 +416,9 @@ class RecipeImageUploadTests(TestCase):
         serializer1 = RecipeSerializer(recipe1)
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
 
     def test_filter_recipes_by_ingredients(self):
         """Test returning recipes with specific ingredients"""
@@ -297,6 +438,52 @@ class RecipeImageUploadTests(TestCase):
         serializer1 = RecipeSerializer(recipe1)
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
+
+    def test_filter_recipes_by_tags_unique(self):
+        """Test a recipe matching several tags is returned once"""
+        recipe = sample_recipe(user=self.user, title='Vegan curry')
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Curry')
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(
+            RECIPE_URL,
+            {'tags': f'{tag1.id},{tag2.id}'}
+        )
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [recipe.id])
+
+    def test_filter_recipes_match_all(self):
+        """Test match=all only returns recipes with every tag"""
+        recipe1 = sample_recipe(user=self.user, title='Vegan curry')
+        recipe2 = sample_recipe(user=self.user, title='Vegan salad')
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Curry')
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag1)
+
+        res = self.client.get(
+            RECIPE_URL,
+            {'tags': f'{tag1.id},{tag2.id},{tag1.id}', 'match': 'all'}
+        )
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [recipe1.id])
+
+    def test_filter_recipes_invalid_ids(self):
+        """Test non-integer tag and ingredient ids are rejected by name"""
+        for name, value in (('tags', 'abc'), ('ingredients', '1,x')):
+            res = self.client.get(RECIPE_URL, {name: value})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(list(res.data), [name])
+
+    def test_filter_recipes_invalid_match(self):
+        """Test an unknown match mode is rejected"""
+        res = self.client.get(RECIPE_URL, {'tags': '1', 'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
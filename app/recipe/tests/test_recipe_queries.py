@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """return recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, tags=2, ingredients=2, **kwargs):
+    """create a recipe with a number of tags and ingredients"""
+    defaults = {
+        'title': 'SampleTitle',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(kwargs)
+    recipe = Recipe.objects.create(user=user, **defaults)
+
+    for i in range(tags):
+        recipe.tags.add(Tag.objects.create(user=user, name=f'Tag {i}'))
+    for i in range(ingredients):
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=user, name=f'Ingredient {i}')
+        )
+
+    return recipe
+
+
+class RecipeQueryCountTests(TestCase):
+    """test that recipe endpoints run a constant number of queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_query_count_constant(self):
+        """test listing recipes does not query per recipe"""
+        sample_recipe(user=self.user)
+
+        # recipes, tags and ingredients
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        for _ in range(10):
+            sample_recipe(user=self.user)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_filtered_list_query_count_constant(self):
+        """test filtering recipes does not query per recipe"""
+        recipes = [sample_recipe(user=self.user) for _ in range(5)]
+        tag_ids = ','.join(
+            str(tag.id) for recipe in recipes for tag in recipe.tags.all()
+        )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_URL, {'tags': tag_ids})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_query_count_constant(self):
+        """test retrieving a recipe does not query per related object"""
+        recipe = sample_recipe(user=self.user, tags=1, ingredients=1)
+
+        with self.assertNumQueries(3):
+            self.client.get(detail_url(recipe.id))
+
+        recipe = sample_recipe(user=self.user, tags=10, ingredients=10)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 10)
+        self.assertEqual(len(res.data['ingredients']), 10)
@@ -0,0 +1,159 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+from recipe.cache import ResponseCache, response_cache
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """return recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, **kwargs):
+    """create and return a sample recipe"""
+    defaults = {
+        'title': 'SampleTitle',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(kwargs)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ResponseCacheTests(TestCase):
+    """test caching of list and retrieve responses"""
+
+    def setUp(self):
+        response_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_served_from_cache(self):
+        """test a repeated list request runs no queries"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        res1 = self.client.get(TAGS_URL)
+
+        with self.assertNumQueries(0):
+            res2 = self.client.get(TAGS_URL)
+
+        self.assertEqual(res1['X-Cache'], 'MISS')
+        self.assertEqual(res2['X-Cache'], 'HIT')
+        self.assertEqual(res1.data, res2.data)
+        self.assertEqual(response_cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_cached_data_is_plain(self):
+        """test cached entries keep no serializer, request or view"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAGS_URL)
+        version = response_cache.version(self.user.pk)
+        data = response_cache.get(response_cache.key(
+            self.user.pk, version, 'tag', 'list',
+            'http://testserver' + TAGS_URL
+        ))
+
+        self.assertIs(type(data), dict)
+        self.assertIs(type(data['results']), list)
+        self.assertIs(type(data['results'][0]), dict)
+        self.assertFalse(hasattr(data['results'], 'serializer'))
+
+    def test_query_params_cached_separately(self):
+        """test different query parameters are different entries"""
+        self.client.get(TAGS_URL)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+    def test_save_invalidates(self):
+        """test creating an object invalidates the user's lists"""
+        self.client.get(TAGS_URL)
+
+        Tag.objects.create(user=self.user, name='Vegan')
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_link_change_invalidates(self):
+        """test adding a tag to a recipe invalidates its detail"""
+        recipe = sample_recipe(user=self.user)
+        self.client.get(detail_url(recipe.id))
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data['tags']), 1)
+
+    def test_other_users_changes_keep_cache(self):
+        """test changes by another user do not invalidate"""
+        user2 = get_user_model().objects.create_user(
+            'test2@tru.com',
+            'testPass123'
+        )
+        self.client.get(RECIPE_URL)
+
+        sample_recipe(user=user2)
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+    def test_bulk_write_invalidates(self):
+        """test bulk writes invalidate without model signals"""
+        self.client.get(TAGS_URL)
+
+        self.client.post(
+            reverse('recipe:tag-bulk'),
+            [{'name': 'Vegan'}],
+            format='json'
+        )
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data['results']), 1)
+
+
+class SharedVersionsTests(TestCase):
+    """test versions are shared by processes caching responses locally"""
+
+    def setUp(self):
+        # two processes, each with its own local response cache
+        self.first = ResponseCache(backend='local', shared='default')
+        self.second = ResponseCache(backend='local', shared='default')
+
+    def test_bump_reaches_other_process(self):
+        """test a change in one process invalidates the other's entries"""
+        version = self.second.version(1)
+        key = self.second.key(1, version, 'tag', 'list')
+        self.second.set(key, ['cached'])
+
+        self.first._new_version(1)
+        new_version = self.second.version(1)
+
+        self.assertNotEqual(new_version, version)
+        self.assertIsNone(
+            self.second.get(self.second.key(1, new_version, 'tag', 'list'))
+        )
+
+    def test_is_local_needs_in_process_versions(self):
+        """test the in-loop fast path is off with an external cache"""
+        self.assertTrue(self.first.is_local)
+
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+        }}):
+            self.assertFalse(self.first.is_local)
@@ -0,0 +1,146 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.search import InvertedIndex, tokenize
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def sample_recipe(user, title, tags=(), ingredients=()):
+    """create a recipe linked to tags and ingredients with the given names"""
+    recipe = Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=10,
+        price=5.00
+    )
+    for name in tags:
+        recipe.tags.add(Tag.objects.create(user=user, name=name))
+    for name in ingredients:
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=user, name=name)
+        )
+
+    return recipe
+
+
+class InvertedIndexTests(TestCase):
+    """test the fallback search index"""
+
+    def test_tokenize(self):
+        """test text is split into lowercase words"""
+        self.assertEqual(
+            tokenize('Thai Green-Curry, 2 ways'),
+            ['thai', 'green', 'curry', '2', 'ways']
+        )
+
+    def test_every_word_must_match(self):
+        """test only entries containing all query words are returned"""
+        index = InvertedIndex()
+        index.add(1, 'green curry', 1.0)
+        index.add(2, 'red curry', 1.0)
+
+        self.assertEqual(index.search('curry green'), [(1, 2.0)])
+        self.assertEqual(index.search('green pasta'), [])
+        self.assertEqual(index.search('  ,. '), [])
+
+    def test_rank_by_weight(self):
+        """test title matches outrank related name matches"""
+        index = InvertedIndex()
+        index.add(1, 'soup', 0.4)
+        index.add(2, 'Soup', 1.0)
+        index.add(3, 'soup', 0.4)
+
+        self.assertEqual(
+            [recipe_id for recipe_id, rank in index.search('SOUP')],
+            [2, 3, 1]
+        )
+
+
+class RecipeSearchApiTests(TestCase):
+    """test the search parameter of the recipe API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _search(self, text, **params):
+        res = self.client.get(RECIPE_URL, {'search': text, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in res.data['results']]
+
+    def test_search_title_tags_and_ingredients(self):
+        """test recipes are found by title, tag and ingredient names"""
+        curry = sample_recipe(self.user, 'Green curry', tags=['Thai'])
+        salad = sample_recipe(self.user, 'Salad', ingredients=['Lime'])
+        sample_recipe(self.user, 'Pasta')
+
+        self.assertEqual(self._search('curry'), [curry.id])
+        self.assertEqual(self._search('thai'), [curry.id])
+        self.assertEqual(self._search('lime'), [salad.id])
+        self.assertEqual(self._search('sushi'), [])
+
+    def test_search_ranks_title_matches_first(self):
+        """test a title match ranks above a tag or ingredient match"""
+        tagged = sample_recipe(self.user, 'Stew', tags=['Lentil'])
+        titled = sample_recipe(self.user, 'Lentil soup')
+
+        self.assertEqual(self._search('lentil'), [titled.id, tagged.id])
+
+    def test_search_sees_changes(self):
+        """test renamed and relinked objects are searchable at once"""
+        recipe = sample_recipe(self.user, 'Stew', tags=['Winter'])
+        self.assertEqual(self._search('winter'), [recipe.id])
+
+        tag = recipe.tags.get()
+        tag.name = 'Autumn'
+        tag.save()
+        self.assertEqual(self._search('winter'), [])
+        self.assertEqual(self._search('autumn'), [recipe.id])
+
+        recipe.tags.clear()
+        self.assertEqual(self._search('autumn'), [])
+
+    def test_search_limited_to_user(self):
+        """test other users' recipes are never returned"""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'testpass'
+        )
+        sample_recipe(other, 'Curry')
+        recipe = sample_recipe(self.user, 'Curry')
+
+        self.assertEqual(self._search('curry'), [recipe.id])
+
+    def test_search_combines_with_filters_and_pages(self):
+        """test search applies with other filters and pages by number"""
+        recipes = [
+            sample_recipe(self.user, f'Bread {n}', tags=['Bake'])
+            for n in range(3)
+        ]
+        sample_recipe(self.user, 'Bread rolls')
+        tag_ids = Tag.objects.filter(name='Bake').values_list('id', flat=True)
+
+        res = self.client.get(RECIPE_URL, {
+            'search': 'bread',
+            'tags': ','.join(str(tag_id) for tag_id in tag_ids),
+            'page_size': 2
+        })
+
+        self.assertEqual(res.data['count'], 3)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [recipes[2].id, recipes[1].id]
+        )
+        self.assertIsNotNone(res.data['next'])
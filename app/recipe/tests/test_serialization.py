@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+
+from recipe.serializers import RecipeRowSerializer, RecipeSerializer
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+class RecipeRowSerializerTests(TestCase):
+    """test the values() row fast path of the recipe list"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ('Vegan', 'Dessert', 'Quick')]
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        prices = ('5', '5.5', '0.01', '999.99')
+        for n, price in enumerate(prices):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {n}',
+                time_minutes=n,
+                price=price,
+                link='https://example.com' if n % 2 else ''
+            )
+            recipe.tags.add(*reversed(tags[:n]))
+            if n:
+                recipe.ingredients.add(ingredient)
+        Recipe.objects.filter(title='Recipe 1').update(
+            image='uploads/recipe/abc.jpg'
+        )
+        self.recipes = Recipe.objects.order_by('-id')
+
+    def test_same_output_as_recipe_serializer(self):
+        """test rows serialize exactly like model instances"""
+        request = RequestFactory().get('/')
+        expected = RecipeSerializer(
+            self.recipes.prefetch_related('tags', 'ingredients'),
+            many=True,
+            context={'request': request}
+        ).data
+        # related ids are listed in id order on both paths
+        for item in expected:
+            item['tags'].sort()
+            item['ingredients'].sort()
+
+        data = RecipeRowSerializer(
+            self.recipes.values(*RecipeRowSerializer.columns),
+            context={'request': request}
+        ).data
+
+        self.assertEqual(
+            JSONRenderer().render(data),
+            JSONRenderer().render(expected)
+        )
+
+    def test_list_queries(self):
+        """test the list endpoint reads rows and one query per relation"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with self.assertNumQueries(3):
+            res = client.get(RECIPE_URL, {'ordering': 'price'})
+
+        self.assertEqual(
+            [item['price'] for item in res.data['results']],
+            ['0.01', '5.00', '5.50', '999.99']
+        )
+
+    def test_empty_rows(self):
+        """test no rows serialize without querying related ids"""
+        with self.assertNumQueries(0):
+            data = RecipeRowSerializer(
+                Recipe.objects.none().values(*RecipeRowSerializer.columns)
+            ).data
+
+        self.assertEqual(data, [])
+
+
+class BenchmarkSerializersTests(TestCase):
+    """test the serialization benchmark command"""
+
+    def test_benchmark_serializers_rolls_back(self):
+        """test the benchmark reports per row costs and leaves no data"""
+        out = StringIO()
+        call_command(
+            'benchmark_serializers',
+            recipes=5, attrs=3, links=2, repeat=1,
+            stdout=out
+        )
+
+        self.assertIn('RecipeRowSerializer', out.getvalue())
+        self.assertIn('FastJSONRenderer', out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
@@ -0,0 +1,139 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+
+from recipe.cache import response_cache
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """return recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class SparseFieldsTests(TestCase):
+    """test the fields and expand parameters of the recipe API"""
+
+    def setUp(self):
+        response_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@tru.com',
+            'testPass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='Salt'
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Curry',
+            time_minutes=20,
+            price=5.00
+        )
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def _sql(self, queries):
+        return ' '.join(query['sql'] for query in queries)
+
+    def test_list_fields(self):
+        """test only the requested fields are listed, always with id"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPE_URL, {'fields': 'title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [{'id': self.recipe.id, 'title': 'Curry'}]
+        )
+        # neither the related tables nor unrequested columns are read
+        sql = self._sql(queries)
+        self.assertNotIn('core_recipe_tags', sql)
+        self.assertNotIn('"price"', sql)
+
+    def test_list_expand(self):
+        """test expanded relations are nested in list responses"""
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_URL, {'expand': 'tags'})
+
+        item = res.data['results'][0]
+        self.assertEqual(
+            item['tags'],
+            [{'id': self.tag.id, 'name': 'Vegan'}]
+        )
+        self.assertEqual(item['ingredients'], [self.ingredient.id])
+
+    def test_list_fields_and_expand(self):
+        """test expand only applies to requested relations"""
+        res = self.client.get(
+            RECIPE_URL,
+            {'fields': 'ingredients,title', 'expand': 'ingredients,tags'}
+        )
+
+        self.assertEqual(res.data['results'], [{
+            'id': self.recipe.id,
+            'title': 'Curry',
+            'ingredients': [{'id': self.ingredient.id, 'name': 'Salt'}],
+        }])
+
+    def test_list_fields_with_ordering(self):
+        """test cursor pages work when the ordering field is not listed"""
+        Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=2.00
+        )
+
+        res = self.client.get(RECIPE_URL, {
+            'fields': 'title',
+            'ordering': 'price',
+            'page_size': 1,
+        })
+        self.assertEqual(res.data['results'][0]['title'], 'Soup')
+
+        res = self.client.get(res.data['next'])
+        self.assertEqual(res.data['results'], [
+            {'id': self.recipe.id, 'title': 'Curry'}
+        ])
+
+    def test_retrieve_defaults_to_nested(self):
+        """test the detail view nests related objects by default"""
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.data['tags'], [{'id': self.tag.id,
+                                             'name': 'Vegan'}])
+
+    def test_retrieve_sparse(self):
+        """test the detail view loads only the requested columns"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                detail_url(self.recipe.id),
+                {'fields': 'title,tags', 'expand': ''}
+            )
+
+        self.assertEqual(res.data, {
+            'id': self.recipe.id,
+            'title': 'Curry',
+            'tags': [self.tag.id],
+        })
+        sql = self._sql(queries)
+        self.assertNotIn('core_recipe_ingredients', sql)
+        self.assertNotIn('"time_minutes"', sql)
+
+    def test_unknown_fields_rejected(self):
+        """test unknown fields and relations are rejected"""
+        res = self.client.get(
+            RECIPE_URL,
+            {'fields': 'title,user', 'expand': 'image'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(res.data), {'fields', 'expand'})
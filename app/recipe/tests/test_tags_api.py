@@ -47,7 +47,7 @@ class PrivateTagsApiTests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Test that tags returned are for the authenticated user"""
@@ -63,8 +63,8 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tags_success(self):
         """create tags successfully"""
@@ -104,8 +104,8 @@ class PrivateTagsApiTests(TestCase):
         serializer1 = TagSerializer(tag1)
         serializer2 = TagSerializer(tag2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_tags_assigned_unique(self):
         """tags returned should be unique"""
@@ -133,6 +133,45 @@ class PrivateTagsApiTests(TestCase):
         serializer1 = TagSerializer(tag1)
         serializer2 = TagSerializer(tag2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertEqual(len(res.data), 1)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertNotIn(serializer2.data, res.data['results'])
+
+    def test_retrieve_tags_with_recipe_counts(self):
+        """test tags can include how many recipes use them"""
+        tag1 = Tag.objects.create(user=self.user, name='Breakfast')
+        tag2 = Tag.objects.create(user=self.user, name='Lunch')
+
+        for title in ('Eggs on toast', 'Porridge'):
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=10,
+                price=5.00,
+                user=self.user
+            )
+            recipe.tags.add(tag1)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL, {'include_counts': 1})
+
+        counts = {
+            item['id']: item['recipe_count'] for item in res.data['results']
+        }
+        self.assertEqual(counts, {tag1.id: 2, tag2.id: 0})
+
+    def test_boolean_params_accept_words(self):
+        """test boolean parameters accept true/false as well as 1/0"""
+        Tag.objects.create(user=self.user, name='Breakfast')
+
+        res = self.client.get(TAGS_URL, {'include_counts': 'true'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['recipe_count'], 0)
+
+    def test_invalid_boolean_params(self):
+        """test invalid boolean parameters return 400 by name"""
+        for name in ('include_counts', 'assigned_only'):
+            res = self.client.get(TAGS_URL, {name: 'maybe'})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(name, res.data)
@@ -0,0 +1,75 @@
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+
+# room for the multipart boundaries and headers around the image
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('Uploaded file is too large.')
+    default_code = 'too_large'
+
+
+class RecipeImageUploadHandler(TemporaryFileUploadHandler):
+    """stream an uploaded image to a temporary file, enforcing limits
+
+    Nothing is kept in memory: chunks go straight to disk and the type
+    and dimensions are read from the image header once the upload is
+    complete, before the file reaches storage.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        """reject bodies announcing more than the limit before reading"""
+        max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+        if content_length and content_length > max_bytes + \
+                MULTIPART_OVERHEAD:
+            raise UploadTooLarge()
+
+    def receive_data_chunk(self, raw_data, start):
+        """write a chunk, stopping once the file exceeds the limit"""
+        if start + len(raw_data) > settings.RECIPE_IMAGE_MAX_BYTES:
+            self.upload_interrupted()
+            raise UploadTooLarge()
+
+        super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        """check the image header of the completed upload"""
+        file = super().file_complete(file_size)
+        try:
+            self.validate_image(file)
+        except ValidationError:
+            self.upload_interrupted()
+            raise
+
+        file.seek(0)
+        return file
+
+    def validate_image(self, file):
+        """validate format and dimensions without decoding pixels"""
+        try:
+            image = Image.open(file)
+            width, height = image.size
+            image_format = image.format
+        except (OSError, Image.DecompressionBombError):
+            raise ValidationError({'image': [_('Upload a valid image.')]})
+
+        if image_format not in settings.RECIPE_IMAGE_FORMATS:
+            raise ValidationError({'image': [
+                _('Unsupported image format %s.') % image_format
+            ]})
+
+        if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+            raise ValidationError({'image': [
+                _('Image has more than %d pixels.')
+                % settings.RECIPE_IMAGE_MAX_PIXELS
+            ]})
@@ -1,33 +1,390 @@
+import hashlib
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
+from rest_framework import fields, viewsets, mixins, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 
+from core.async_views import AsyncReadMixin
+from core.authentication import CachedTokenAuthentication
+from core.db.routers import ReplicaReadMixin
 from core.models import Tag, Ingredient, Recipe
-from . import serializers
+from . import autocomplete, images, search, serializers
+from .fields import to_pk
+from .autocomplete import autocomplete_cache
+from .cache import response_cache
+from .compiled import ReadSerializer
+from .uploads import RecipeImageUploadHandler
+from .pagination import NameCursorPagination, RecipeCursorPagination, \
+    RecipeSearchPagination
+
+
+class CachedResponseMixin:
+    """serve reads from the per-user collection version
+
+    Requests whose validators match the version get a 304 before the
+    queryset runs, other requests are served from the response cache.
+    """
+
+    def _validators(self, request, version):
+        """return the ETag and Last-Modified time for a version"""
+        digest = hashlib.sha1('\n'.join((
+            version,
+            request.build_absolute_uri(),
+            request.META.get('HTTP_ACCEPT', ''),
+        )).encode()).hexdigest()
+
+        return f'W/"{digest}"', float(version)
+
+    def _not_modified(self, request, etag, last_modified):
+        """return whether the client copy is still current"""
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = [tag.replace('W/', '', 1)
+                     for tag in parse_etags(if_none_match)]
+            if '*' in etags:
+                return self._object_exists()
+            return etag.replace('W/', '', 1) in etags
+
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE')
+        )
+        # HTTP dates have whole seconds, versions never share one
+        return if_modified_since is not None \
+            and int(last_modified) <= if_modified_since
+
+    def _object_exists(self):
+        """return whether the requested object exists, for If-None-Match: *
+
+        Lists always exist, a missing object raises Http404.
+        """
+        if self.action == 'retrieve':
+            self.get_object()
+
+        return True
+
+    def _matches_any(self, request):
+        """return whether If-None-Match is * on a retrieve"""
+        return self.action == 'retrieve' and '*' in parse_etags(
+            request.META.get('HTTP_IF_NONE_MATCH', '')
+        )
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        """answer conditional requests, or return cached data"""
+        version = response_cache.version(request.user.pk)
+        etag, last_modified = self._validators(request, version)
+
+        if self._not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = self._cached_data_response(
+                version, handler, request, *args, **kwargs
+            )
+
+        return self._add_validators(response, etag, last_modified)
+
+    def _add_validators(self, response, etag, last_modified):
+        """add the validators and caching headers to a response"""
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Authorization', 'Accept'))
+
+        return response
+
+    def read_in_loop(self, request, user):
+        """answer from the in-process response cache, or return None
+
+        Mirrors _cached_response for conditional requests and cache
+        hits, the only reads that need neither the database nor a
+        shared cache.
+        """
+        # checking the object exists needs the database
+        if not response_cache.is_local or self._matches_any(request):
+            return None
+
+        version = response_cache.version(user.pk)
+        etag, last_modified = self._validators(request, version)
+        if self._not_modified(request, etag, last_modified):
+            response = self.loop_response(
+                status_code=status.HTTP_304_NOT_MODIFIED
+            )
+        else:
+            data = response_cache.get(response_cache.key(
+                user.pk,
+                version,
+                self.basename,
+                self.action,
+                request.build_absolute_uri()
+            ))
+            if data is None:
+                return None
+            response = self.loop_response(data)
+            response['X-Cache'] = 'HIT'
+
+        return self._add_validators(response, etag, last_modified)
+
+    def _cached_data_response(self, version, handler, request, *args,
+                              **kwargs):
+        """return cached data for this request or cache the response"""
+        if not response_cache.enabled:
+            return handler(request, *args, **kwargs)
+
+        key = response_cache.key(
+            request.user.pk,
+            version,
+            self.basename,
+            self.action,
+            request.build_absolute_uri()
+        )
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """list objects, cached per user"""
+        return self._cached_response(super().list, request, *args, **kwargs)
 
 
-class BaseAttrViewSet(viewsets.GenericViewSet,
+class CompiledReadMixin:
+    """serialize list and retrieve responses with compiled serializers"""
+    read_actions = ('list', 'retrieve')
+
+    def get_serializer(self, *args, **kwargs):
+        """return a compiled stand-in for reads, a serializer otherwise"""
+        if self.action not in self.read_actions or 'data' in kwargs:
+            return super().get_serializer(*args, **kwargs)
+
+        instance = args[0] if args else kwargs.get('instance')
+        return ReadSerializer(
+            self.get_serializer_class(),
+            instance,
+            many=kwargs.get('many', False),
+            context=self.get_serializer_context()
+        )
+
+
+class BulkMixin:
+    """create, update and delete many objects in one request"""
+
+    def _bulk_response(self, objs, status_code):
+        """serialize objs in request order with the regular serializer"""
+        by_id = self.get_queryset().filter(
+            pk__in=[obj.pk for obj in objs]
+        ).in_bulk()
+        serializer = self.serializer_class(
+            [by_id[obj.pk] for obj in objs],
+            many=True,
+            context=self.get_serializer_context()
+        )
+
+        return Response(serializer.data, status=status_code)
+
+    def _to_ids(self, values):
+        """convert the valid ids to integers, dropping the rest"""
+        ids = []
+        for value in values:
+            try:
+                ids.append(to_pk(value))
+            except (TypeError, ValueError):
+                continue
+
+        return ids
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """create, update or delete the listed objects in one transaction"""
+        with transaction.atomic():
+            if request.method == 'POST':
+                response = self.bulk_create(request)
+            elif request.method == 'PATCH':
+                response = self.bulk_update(request)
+            else:
+                response = self.bulk_destroy(request)
+
+            # bulk writes do not send model signals
+            response_cache.bump(request.user.pk)
+
+        return response
+
+    def search_recipes(self, ids):
+        """return the recipes whose search vectors include the objects"""
+        return Recipe.objects.filter(pk__in=ids)
+
+    def _refresh_search(self, objs):
+        """recompute the search vectors the written objects feed
+
+        Deletes need nothing, they send the signals refreshing them.
+        """
+        search.refresh(self.search_recipes([obj.pk for obj in objs]))
+
+    def bulk_create(self, request):
+        """create every object in the request body"""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        objs = serializer.save(user=self.request.user)
+        self._refresh_search(objs)
+
+        return self._bulk_response(objs, status.HTTP_201_CREATED)
+
+    def bulk_update(self, request):
+        """partially update every object in the request body"""
+        items = request.data if isinstance(request.data, list) else []
+        instances = self.get_queryset().filter(pk__in=self._to_ids(
+            item.get('id') for item in items if isinstance(item, dict)
+        ))
+        serializer = self.get_serializer(
+            instances,
+            data=request.data,
+            many=True,
+            partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        objs = serializer.save()
+        self._refresh_search(objs)
+
+        return self._bulk_response(objs, status.HTTP_200_OK)
+
+    def bulk_destroy(self, request):
+        """delete every object listed in the ids of the request body"""
+        ids = request.data.get('ids') \
+            if isinstance(request.data, dict) else None
+        if not isinstance(ids, list):
+            raise ValidationError({'ids': ['Expected a list of ids.']})
+
+        pks = set()
+        errors = []
+        for value in ids:
+            try:
+                pks.add(to_pk(value))
+            except (TypeError, ValueError):
+                errors.append('Incorrect type. Expected pk value, received '
+                              f'{type(value).__name__}.')
+
+        queryset = self.get_queryset().filter(pk__in=pks)
+        missing = pks - set(queryset.values_list('pk', flat=True))
+        errors.extend(f'Invalid pk "{pk}" - object does not exist.'
+                      for pk in sorted(missing))
+        if errors:
+            raise ValidationError({'ids': errors})
+
+        queryset.delete()
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BaseAttrViewSet(CachedResponseMixin,
+                      AsyncReadMixin,
+                      ReplicaReadMixin,
+                      CompiledReadMixin,
+                      BulkMixin,
+                      viewsets.GenericViewSet,
                       mixins.ListModelMixin,
                       mixins.CreateModelMixin):
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = NameCursorPagination
+
+    def _param_to_bool(self, name):
+        """convert a boolean query parameter, such as 0/1 or true/false"""
+        value = self.request.query_params.get(name)
+        if value is None:
+            return False
+
+        try:
+            return fields.BooleanField().run_validation(value)
+        except ValidationError as exc:
+            raise ValidationError({name: exc.detail})
 
     def get_queryset(self):
         """Return objects for authenticated user only"""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
-
         queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(
-                recipe__isnull=False
-            ).distinct()
+        if self._param_to_bool('assigned_only'):
+            queryset = queryset.assigned()
+
+        if self._param_to_bool('include_counts'):
+            queryset = queryset.with_recipe_count()
 
         return queryset.filter(user=self.request.user).order_by('-name')
 
+    def search_recipes(self, ids):
+        """return the recipes linked to the objects"""
+        return Recipe.objects.filter(
+            pk__in=self.queryset.filter(pk__in=ids).values('recipe')
+        )
+
+    def _autocomplete_text(self):
+        """return the autocomplete text, lowercased, if any"""
+        if self.action != 'list':
+            return ''
+
+        return self.request.query_params.get('q', '').strip().lower()
+
+    @property
+    def paginator(self):
+        """return autocomplete matches as a single capped list"""
+        if not hasattr(self, '_paginator') and self._autocomplete_text():
+            self._paginator = None
+
+        return super().paginator
+
+    def list(self, request, *args, **kwargs):
+        """list objects, or autocomplete names with the q parameter"""
+        if self._autocomplete_text():
+            return self._cached_response(
+                self.autocomplete, request, *args, **kwargs
+            )
+
+        return super().list(request, *args, **kwargs)
+
+    def autocomplete(self, request, *args, **kwargs):
+        """return the best matching names, from memory when possible"""
+        text = self._autocomplete_text()
+        limit = settings.RECIPE_AUTOCOMPLETE_LIMIT
+        queryset = self.filter_queryset(self.get_queryset())
+        scope = (
+            self.basename,
+            request.user.pk,
+            self._param_to_bool('assigned_only'),
+            self._param_to_bool('include_counts'),
+        )
+        version = response_cache.version(request.user.pk)
+        narrow = not autocomplete.is_fuzzy(queryset.db)
+
+        rows = autocomplete_cache.get(scope, version, text, limit, narrow)
+        if rows is None:
+            serializer = self.get_serializer(
+                autocomplete.match(queryset, text, limit),
+                many=True
+            )
+            rows = list(serializer.data)
+            autocomplete_cache.set(scope, version, text, rows)
+
+        return Response(rows)
+
+    def get_serializer_class(self):
+        """include recipe counts when they were requested"""
+        if self.action == 'list' and self._param_to_bool('include_counts'):
+            return self.count_serializer_class
+
+        return self.serializer_class
+
     def perform_create(self, serializer):
         """create a new tag"""
         serializer.save(user=self.request.user)
@@ -37,49 +394,266 @@ class TagViewSet(BaseAttrViewSet):
     """Manage tags in database"""
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    count_serializer_class = serializers.TagCountSerializer
 
 
 class IngredientViewSet(BaseAttrViewSet):
     """Manage ingredient in database"""
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    count_serializer_class = serializers.IngredientCountSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedResponseMixin,
+                    AsyncReadMixin,
+                    ReplicaReadMixin,
+                    CompiledReadMixin,
+                    BulkMixin,
+                    viewsets.ModelViewSet):
     """manage recipes in database"""
     serializer_class = serializers.RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
+    MATCH_MODES = ('any', 'all')
+    # ordering parameter values, each ends on id so pages are stable
+    ORDERINGS = {
+        '-id': ('-id',),
+        'id': ('id',),
+        'time_minutes': ('time_minutes', 'id'),
+        '-time_minutes': ('-time_minutes', '-id'),
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id'),
+    }
+    RANGE_FILTERS = {
+        'max_time': ('time_minutes__lte', fields.IntegerField(min_value=0)),
+        'min_price': ('price__gte', fields.DecimalField(
+            max_digits=None, decimal_places=None
+        )),
+        'max_price': ('price__lte', fields.DecimalField(
+            max_digits=None, decimal_places=None
+        )),
+    }
 
-    def _params_to_int(self, qs):
+    def _params_to_int(self, name, qs):
         """convert a list of string ids to integers"""
-        return [int(str_id) for str_id in qs.split(',')]
+        ids = []
+        errors = []
+        for str_id in qs.split(','):
+            try:
+                ids.append(fields.IntegerField().run_validation(str_id))
+            except ValidationError:
+                errors.append(f'Invalid id "{str_id}", must be an integer.')
+
+        if errors:
+            raise ValidationError({name: errors})
+
+        return ids
+
+    def _params_to_names(self, name, choices):
+        """return the comma separated names of a parameter, in choices
+        order, or None when the parameter is missing
+        """
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+
+        names = {item.strip() for item in value.split(',') if item.strip()}
+        unknown = names.difference(choices)
+        if unknown:
+            raise ValidationError({name: [
+                f'Unknown field "{item}", must be one of: '
+                f'{", ".join(choices)}' for item in sorted(unknown)
+            ]})
+
+        return tuple(choice for choice in choices if choice in names)
+
+    def _sparse_fields(self):
+        """return the fields and nested relations requested for reads"""
+        params = {}
+        errors = {}
+        for name, choices in (
+            ('fields', serializers.RecipeSerializer.Meta.fields),
+            ('expand', tuple(serializers.RECIPE_EXPANDABLE)),
+        ):
+            try:
+                params[name] = self._params_to_names(name, choices)
+            except ValidationError as exc:
+                errors.update(exc.detail)
+
+        if errors:
+            raise ValidationError(errors)
+
+        fields, expand = params['fields'], params['expand']
+        if fields is not None and 'id' not in fields:
+            fields = ('id',) + fields
+        if expand is None:
+            # the detail view nests related objects unless told otherwise
+            expand = tuple(serializers.RECIPE_EXPANDABLE) \
+                if self.action == 'retrieve' else ()
+
+        return fields, expand
 
     def get_queryset(self):
         """get objects for a user"""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
+        match = self.request.query_params.get('match', 'any')
+        if match not in self.MATCH_MODES:
+            raise ValidationError(
+                {'match': f'Must be one of: {", ".join(self.MATCH_MODES)}'}
+            )
+
+        # the search vector is only read by the database
+        queryset = self.queryset.defer('search_vector')
         if tags:
-            tag_ids = self._params_to_int(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            tag_ids = self._params_to_int('tags', tags)
+            queryset = queryset.filter_related('tags', tag_ids, match)
 
         if ingredients:
-            ingredient_ids = self._params_to_int(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            ingredient_ids = self._params_to_int('ingredients', ingredients)
+            queryset = queryset.filter_related(
+                'ingredients', ingredient_ids, match
+            )
+
+        queryset = queryset.filter(**self._range_filters())
+        queryset = self._prefetch_related(queryset)
+        queryset = queryset.filter(user=self.request.user)
+
+        text = self._search_text()
+        if text:
+            queryset = search.search(queryset, self.request.user, text)
+            if 'ordering' not in self.request.query_params:
+                return queryset
+
+        return queryset.order_by(*self.get_ordering())
+
+    def _range_filters(self):
+        """return lookups for the time and price range parameters"""
+        lookups = {}
+        errors = {}
+        for param, (lookup, field) in self.RANGE_FILTERS.items():
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            try:
+                lookups[lookup] = field.run_validation(value)
+            except ValidationError as exc:
+                errors[param] = exc.detail
+
+        if errors:
+            raise ValidationError(errors)
+
+        return lookups
+
+    def get_ordering(self):
+        """return the order_by fields of the ordering parameter"""
+        ordering = self.request.query_params.get('ordering', '-id')
+        if ordering not in self.ORDERINGS:
+            raise ValidationError(
+                {'ordering': f'Must be one of: {", ".join(self.ORDERINGS)}'}
+            )
+
+        return self.ORDERINGS[ordering]
+
+    def _search_text(self):
+        """return the full-text search query, if any"""
+        if self.action != 'list':
+            return ''
+
+        return self.request.query_params.get('search', '').strip()
+
+    @property
+    def paginator(self):
+        """page ranked search results by number instead of cursor"""
+        if not hasattr(self, '_paginator') and self._search_text():
+            self._paginator = RecipeSearchPagination()
+
+        return super().paginator
+
+    def _prefetch_related(self, queryset):
+        """load only the columns and relations the serializer renders"""
+        # list reads related ids for its values() rows itself
+        if self.action in ('upload_image', 'list'):
+            return queryset
+
+        if self.action == 'retrieve':
+            columns, relations = serializers.row_plan(
+                self.get_serializer_class()
+            )
+            queryset = queryset.only(*columns)
+        else:
+            relations = [(field, ()) for field in ('tags', 'ingredients')]
+
+        related_models = {'tags': Tag, 'ingredients': Ingredient}
+        # plain ids only need the primary key, nested objects their columns
+        return queryset.prefetch_related(*[
+            Prefetch(field, queryset=related_models[field].objects.only(
+                *(nested or ('id',))
+            ).order_by('id'))
+            for field, nested in relations
+        ])
+
+    def list(self, request, *args, **kwargs):
+        """list recipes, cached per user"""
+        return self._cached_response(
+            self.list_rows, request, *args, **kwargs
+        )
+
+    def list_rows(self, request, *args, **kwargs):
+        """list recipes serialized straight from values() rows"""
+        serializer_class = self.get_serializer_class()
+        columns = list(
+            serializers.RecipeRowSerializer.columns_for(serializer_class)
+        )
+        # cursors are read from the rows
+        for field in self.get_ordering():
+            if field.lstrip('-') not in columns:
+                columns.append(field.lstrip('-'))
+
+        queryset = self.filter_queryset(self.get_queryset()).values(*columns)
+        page = self.paginate_queryset(queryset)
+        serializer = serializers.RecipeRowSerializer(
+            queryset if page is None else page,
+            serializer_class=serializer_class,
+            context=self.get_serializer_context()
+        )
+
+        if page is None:
+            return Response(serializer.data)
 
-        return queryset.filter(user=self.request.user)
+        return self.get_paginated_response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """retrieve a recipe, cached per user"""
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
 
     def get_serializer_class(self):
         """return appropriate serializer class"""
-        if self.action == 'retrieve':
-            return serializers.RecipeDetailSerializer
+        if self.action in ('list', 'retrieve'):
+            return self._read_serializer_class()
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+        elif self.action == 'bulk':
+            return serializers.RecipeBulkSerializer
 
         return self.serializer_class
 
+    def _read_serializer_class(self):
+        """return the serializer for the requested fields and nesting"""
+        fields, expand = self._sparse_fields()
+        if fields is None:
+            if expand == tuple(serializers.RECIPE_EXPANDABLE):
+                return serializers.RecipeDetailSerializer
+            if not expand:
+                return serializers.RecipeSerializer
+            fields = serializers.RecipeSerializer.Meta.fields
+
+        return serializers.recipe_serializer_class(fields, expand)
+
     def perform_create(self, serializer):
         """create a new recipe"""
         serializer.save(user=self.request.user)
@@ -87,14 +661,25 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """upload an image to an existing recipe"""
+        # must be set before request.data is first read
+        request._request.upload_handlers = [
+            RecipeImageUploadHandler(request._request)
+        ]
         recipe = self.get_object()
+        old_name = recipe.image.name
         serializer = self.get_serializer(
             recipe,
             data=request.data
         )
 
         if serializer.is_valid():
-            serializer.save()
+            recipe = serializer.save()
+            # resize once the new image is committed, off the request
+            transaction.on_commit(
+                lambda: images.enqueue(recipe.image.name)
+            )
+            if old_name and old_name != recipe.image.name:
+                transaction.on_commit(lambda: images.release(old_name))
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
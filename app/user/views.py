@@ -1,27 +1,46 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from core.async_views import AsyncReadMixin
+from core.authentication import CachedTokenAuthentication
+from core.db.routers import ReplicaReadMixin
+
 from .serializers import UserSerializer, AuthTokenSerializer
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(AsyncReadMixin, generics.CreateAPIView):
     """Create a new user in the system"""
     serializer_class = UserSerializer
+    # hashing the password runs in a worker thread of its own under ASGI
+    async_actions = ()
 
 
-class CreateTokenView(ObtainAuthToken):
+class CreateTokenView(AsyncReadMixin, ObtainAuthToken):
     """create a new auth token for user"""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    # checking the password runs in a worker thread of its own under ASGI
+    async_actions = ()
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(AsyncReadMixin,
+                     ReplicaReadMixin,
+                     generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
         """retrieve authenticated user"""
         return self.request.user
+
+    def read_in_loop(self, request, user):
+        """serialize the user of a locally cached token"""
+        serializer = self.get_serializer_class()(
+            user,
+            context=self.get_serializer_context()
+        )
+
+        return self.loop_response(serializer.data)